@@ -4,23 +4,31 @@ Machine Learning Analytics and Anomaly Detection System
 Provides predictive analytics, anomaly detection, and intelligent insights
 """
 
+import asyncio
 import os
+import glob
 import time
 import logging
+import threading
 import numpy as np
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 from influxdb import InfluxDBClient
 from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import DBSCAN
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
 import joblib
-import json
 import warnings
 
-warnings.filterwarnings("ignore")
+try:
+    from numba import njit, prange
+except ImportError:
+    # numba is optional; anomaly scoring falls back to scikit-learn
+    njit = None
+
+# The compiled forest scorer runs its own parallel loop; analysis stages call
+# it from several worker threads at once, so scoring is serialized
+_FOREST_SCORING_LOCK = threading.Lock()
 
 # Configuration
 INFLUXDB_CONFIG = {
@@ -32,7 +40,25 @@ INFLUXDB_CONFIG = {
 
 ML_DATABASE = "ml_analytics"
 ANALYSIS_INTERVAL = 900  # 15 minutes
+CYCLE_CACHE_RANGE = "7d"  # Widest window any analysis reads per cycle
 MODEL_RETRAIN_INTERVAL = 3600  # 1 hour
+# (measurement, field) probed at cycle start to tell whether new data arrived
+FRESHNESS_PROBES = [
+    ("cpu", "usage_idle"),
+    ("mem", "used_percent"),
+    ("disk", "used_percent"),
+    ("net", "bytes_recv"),
+]
+# (measurement, field, agg, every) the analysis stages aggregate; fetched
+# into the cycle cache in one request before the stages start
+PREFETCH_AGGREGATES = [
+    ("cpu", "usage_idle", "mean", "1h"),
+    ("mem", "used_percent", "mean", "1h"),
+    ("disk", "used_percent", "mean", "1h"),
+    ("net", "bytes_recv", "sum", "1d"),
+]
+ALERT_WEBHOOK_URL = "http://slack-notifier:5001/webhook"
+HTTP_TIMEOUT = 5  # seconds
 
 # Setup logging
 logging.basicConfig(
@@ -41,14 +67,81 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+_LP_TAG_ESCAPES = str.maketrans(
+    {"\\": "\\\\", ",": "\\,", " ": "\\ ", "=": "\\=", "\n": "\\n"}
+)
+
+
+def _line_value(value) -> str:
+    """Render a field value the way the InfluxDB line protocol expects"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, str):
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{escaped}"'
+    return repr(float(value))
+
+
+def _average_path_length_lut(max_samples: int) -> np.ndarray:
+    """Tabulate the expected BST search path length for 0..max_samples nodes
+
+    Every leaf of a fitted Isolation Forest holds at most max_samples
+    samples, so this table replaces evaluating the harmonic-number
+    approximation for each scored sample with a single integer gather.
+    """
+    n = np.arange(max_samples + 1, dtype=np.float64)
+    lut = np.zeros(max_samples + 1)
+    lut[2:] = 1.0
+    big = n > 2
+    lut[big] = (
+        2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    )
+    return lut
+
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _forest_path_lengths(X, features, thresholds, left, right, path_correction):
+        """Sum the isolation path length of every sample over all trees"""
+        n_trees = features.shape[0]
+        depths = np.zeros(X.shape[0])
+
+        for i in prange(X.shape[0]):
+            total = 0.0
+            for t in range(n_trees):
+                node = 0
+                depth = 0
+                while left[t, node] != -1:
+                    if X[i, features[t, node]] <= thresholds[t, node]:
+                        node = left[t, node]
+                    else:
+                        node = right[t, node]
+                    depth += 1
+                total += depth + path_correction[t, node]
+            depths[i] = total
+
+        return depths
+
+
 class MLAnalytics:
     def __init__(self):
         self.client = None
         self.models = {}
-        self.scalers = {}
+        self.model_buckets = {}
+        self.forests = {}
+        self._cycle_cache = {}
+        self._last_max_ts = {}
+        # Keep-alive pool for webhook calls so each cycle skips the TCP setup
+        self._http = requests.Session()
+        self._http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
         self.setup_influxdb()
         self.model_path = "/tmp/ml_models"
         os.makedirs(self.model_path, exist_ok=True)
+        self.snapshot_path = "/tmp/ml_cache"
+        os.makedirs(self.snapshot_path, exist_ok=True)
 
     def setup_influxdb(self):
         """Setup InfluxDB connection and database"""
@@ -66,41 +159,260 @@ class MLAnalytics:
             self.client = None
 
     def get_metrics_data(
-        self, measurement: str, time_range: str = "24h", database: str = "telegraf"
+        self,
+        measurement: str,
+        fields: list,
+        time_range: str = "24h",
+        database: str = "telegraf",
+        tags: list = None,
     ):
-        """Retrieve metrics data from InfluxDB"""
+        """Retrieve metrics data from InfluxDB
+
+        Only the requested ``fields`` are selected and rows come back oldest
+        first, which is the order resampling expects. When ``tags`` are given
+        the query is grouped by them and each tag is added as a column.
+        """
         try:
-            query = f"""
-            SELECT * FROM "{measurement}"
-            WHERE time >= now() - {time_range}
-            ORDER BY time DESC
-            """
+            query = (
+                f'SELECT {self._field_list(fields)} FROM "{measurement}" '
+                f"WHERE time >= now() - {time_range}"
+            )
+            if tags:
+                query += f" GROUP BY {self._field_list(tags)}"
 
-            self.client.switch_database(database)
-            result = self.client.query(query)
+            result = self.client.query(query, database=database)
 
             if result.raw and "series" in result.raw:
-                series = result.raw["series"][0]
-                columns = series["columns"]
-                values = series["values"]
-
-                # Convert to pandas DataFrame
-                df = pd.DataFrame(values, columns=columns)
-                df["time"] = pd.to_datetime(df["time"])
-                df = df.set_index("time")
+                frames = []
+                for series in result.raw["series"]:
+                    df = self._series_to_frame(series)
+                    for tag, value in series.get("tags", {}).items():
+                        df[tag] = value
+                    frames.append(df)
 
-                # Convert numeric columns
-                for col in df.columns:
-                    if col != "time":
-                        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-                return df
+                return frames[0] if len(frames) == 1 else pd.concat(frames)
 
         except Exception as e:
             logger.error(f"Error retrieving data for {measurement}: {e}")
 
         return pd.DataFrame()
 
+    def get_metrics_snapshot_batch(self, specs: list, database: str = "telegraf"):
+        """Retrieve raw metric windows, fetching only rows newer than the snapshot
+
+        ``specs`` is a list of ``(measurement, fields, time_range)`` tuples.
+        Each window is kept under snapshot_path as a pair of .npy files
+        (int64 nanosecond timestamps and a float32 value block), so a cycle
+        only asks InfluxDB for points after the last stored timestamp and
+        memory-maps the rest instead of re-parsing it.
+        """
+        now = pd.Timestamp.now(tz="UTC").value
+        snapshots = []
+        statements = []
+
+        for measurement, fields, time_range in specs:
+            times, values = self._load_snapshot(database, measurement, fields)
+            if len(times):
+                since = f"time > {int(times[-1])}"
+            else:
+                since = f"time >= now() - {time_range}"
+            snapshots.append((times, values))
+            statements.append(
+                f'SELECT {self._field_list(fields)} FROM "{measurement}" '
+                f"WHERE {since}"
+            )
+
+        frames = self._query_frames(statements, database)
+        data = {}
+
+        for (measurement, fields, time_range), (times, values), frame in zip(
+            specs, snapshots, frames
+        ):
+            if not frame.empty:
+                times = np.concatenate([times, frame.index.as_unit("ns").asi8])
+                values = np.concatenate(
+                    [values, frame.reindex(columns=fields).to_numpy(np.float32)]
+                )
+
+            start = np.searchsorted(times, now - pd.Timedelta(time_range).value)
+            times, values = times[start:], values[start:]
+
+            if not frame.empty:
+                self._save_snapshot(database, measurement, fields, times, values)
+
+            data[measurement] = pd.DataFrame(
+                values,
+                columns=fields,
+                index=pd.to_datetime(times, utc=True),
+                copy=False,
+            )
+
+        return data
+
+    def _snapshot_files(self, database: str, measurement: str, fields: list):
+        """Return the timestamp and value file paths of one snapshot"""
+        stem = os.path.join(
+            self.snapshot_path, f"{database}_{measurement}_{'_'.join(fields)}"
+        )
+        return f"{stem}.times.npy", f"{stem}.values.npy"
+
+    def _load_snapshot(self, database: str, measurement: str, fields: list):
+        """Memory-map a stored snapshot, or return empty arrays when absent"""
+        times_file, values_file = self._snapshot_files(database, measurement, fields)
+
+        try:
+            times = np.load(times_file, mmap_mode="r")
+            values = np.load(values_file, mmap_mode="r")
+            if len(times) == len(values):
+                return times, values
+        except (OSError, ValueError):
+            pass
+
+        return np.empty(0, dtype=np.int64), np.empty((0, len(fields)), np.float32)
+
+    def _save_snapshot(
+        self,
+        database: str,
+        measurement: str,
+        fields: list,
+        times: np.ndarray,
+        values: np.ndarray,
+    ):
+        """Persist a snapshot, replacing the previous files atomically"""
+        for path, array in zip(
+            self._snapshot_files(database, measurement, fields), (times, values)
+        ):
+            try:
+                with open(f"{path}.tmp", "wb") as f:
+                    np.save(f, np.ascontiguousarray(array))
+                os.replace(f"{path}.tmp", path)
+            except OSError as e:
+                logger.error(f"Error saving snapshot {path}: {e}")
+
+    def _latest_timestamps(self) -> dict:
+        """Return the newest point time of each FRESHNESS_PROBES measurement
+
+        All probes go out as one request of ``last()`` selectors, so the
+        check costs a single round-trip. Measurements without data are left
+        out of the result.
+        """
+        statements = [
+            f'SELECT last("{field}") FROM "{measurement}"'
+            for measurement, field in FRESHNESS_PROBES
+        ]
+        frames = self._query_frames(statements, "telegraf")
+
+        return {
+            measurement: frame.index[-1]
+            for (measurement, _), frame in zip(FRESHNESS_PROBES, frames)
+            if not frame.empty
+        }
+
+    def get_aggregated_batch(self, specs: list, database: str = "telegraf"):
+        """Retrieve several bucketed aggregates from InfluxDB in one request
+
+        ``specs`` is a list of ``(measurement, field, agg, every, time_range)``
+        tuples. The bucketing runs server side with ``GROUP BY time(every)``,
+        so only one point per bucket crosses the wire. Empty buckets are
+        filled with 0 for counting aggregates and with the previous value
+        otherwise. Returns a list of Series in the order of ``specs``.
+
+        Each aggregate is fetched once per analysis cycle over
+        CYCLE_CACHE_RANGE and memoized; shorter windows are sliced from the
+        cached series instead of being queried again.
+        """
+        results = [None] * len(specs)
+        missing = []
+
+        for i, (measurement, field, agg, every, time_range) in enumerate(specs):
+            key = (database, measurement, field, agg, every)
+            if key in self._cycle_cache:
+                results[i] = self._slice_window(self._cycle_cache[key], time_range)
+            else:
+                missing.append(i)
+
+        if missing:
+            statements = [
+                self._aggregate_statement(*specs[i][:4], CYCLE_CACHE_RANGE)
+                for i in missing
+            ]
+            frames = self._query_frames(statements, database)
+
+            for i, frame in zip(missing, frames):
+                measurement, field, agg, every, time_range = specs[i]
+                series = (
+                    frame[field]
+                    if field in frame.columns
+                    else pd.Series(dtype=np.float64)
+                )
+                self._cycle_cache[(database, measurement, field, agg, every)] = series
+                results[i] = self._slice_window(series, time_range)
+
+        return results
+
+    @staticmethod
+    def _slice_window(series: pd.Series, time_range: str) -> pd.Series:
+        """Return the trailing time_range of a time-indexed series"""
+        if series.empty:
+            return series
+        start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(time_range)
+        return series.loc[start:]
+
+    def _query_frames(self, statements: list, database: str):
+        """Run InfluxQL statements as one request and return a frame for each"""
+        frames = [pd.DataFrame() for _ in statements]
+
+        try:
+            results = self.client.query("; ".join(statements), database=database)
+            if not isinstance(results, list):
+                results = [results]
+
+            for i, result in enumerate(results):
+                if result.raw and "series" in result.raw:
+                    frames[i] = self._series_to_frame(result.raw["series"][0])
+
+        except Exception as e:
+            logger.error(f"Error retrieving batched metrics from {database}: {e}")
+
+        return frames
+
+    @staticmethod
+    def _aggregate_statement(
+        measurement: str, field: str, agg: str, every: str, time_range: str
+    ) -> str:
+        """Build an InfluxQL statement bucketing one field with GROUP BY time()"""
+        fill = "0" if agg in ("sum", "count") else "previous"
+        return (
+            f'SELECT {agg}("{field}") AS "{field}" FROM "{measurement}" '
+            f"WHERE time >= now() - {time_range} "
+            f"GROUP BY time({every}) fill({fill})"
+        )
+
+    @staticmethod
+    def _field_list(fields: list) -> str:
+        """Quote field names for an InfluxQL SELECT clause"""
+        return ", ".join(f'"{field}"' for field in fields)
+
+    @staticmethod
+    def _series_to_frame(series: dict) -> pd.DataFrame:
+        """Convert a raw InfluxDB series into a time-indexed float DataFrame
+
+        All fields are packed into one C-contiguous float32 array laid out
+        column by column, which pandas adopts as a single block without
+        copying. Every column is then a contiguous run of memory, so the
+        fillna/resample/arithmetic passes downstream never trigger a layout
+        flip or block consolidation.
+        """
+        times, *values = zip(*series["values"])
+        block = np.array(values, dtype=np.float32)
+
+        return pd.DataFrame(
+            block.T,
+            columns=series["columns"][1:],
+            index=pd.to_datetime(times, utc=True),
+            copy=False,
+        )
+
     def detect_system_anomalies(self):
         """Detect system performance anomalies"""
         logger.info("Analyzing system performance anomalies...")
@@ -108,51 +420,96 @@ class MLAnalytics:
         anomalies = []
 
         try:
+            data = self.get_metrics_snapshot_batch(
+                [
+                    ("cpu", ["usage_idle"], "24h"),
+                    ("mem", ["used_percent"], "24h"),
+                    ("disk", ["used_percent"], "24h"),
+                    ("net", ["bytes_recv", "bytes_sent"], "24h"),
+                ]
+            )
+
+            series = []
+
             # Analyze CPU usage
-            cpu_data = self.get_metrics_data("cpu", "24h")
+            cpu_data = data["cpu"]
             if not cpu_data.empty and "usage_idle" in cpu_data.columns:
                 cpu_usage = 100 - cpu_data["usage_idle"].fillna(0)
-                cpu_anomalies = self.detect_univariate_anomalies(
-                    cpu_usage, "cpu_usage", threshold=0.1
-                )
-                anomalies.extend(cpu_anomalies)
+                series.append((cpu_usage, "cpu_usage", 0.1))
 
             # Analyze memory usage
-            mem_data = self.get_metrics_data("mem", "24h")
+            mem_data = data["mem"]
             if not mem_data.empty and "used_percent" in mem_data.columns:
-                mem_anomalies = self.detect_univariate_anomalies(
-                    mem_data["used_percent"], "memory_usage", threshold=0.1
-                )
-                anomalies.extend(mem_anomalies)
+                series.append((mem_data["used_percent"], "memory_usage", 0.1))
 
             # Analyze disk usage
-            disk_data = self.get_metrics_data("disk", "24h")
+            disk_data = data["disk"]
             if not disk_data.empty and "used_percent" in disk_data.columns:
-                disk_anomalies = self.detect_univariate_anomalies(
-                    disk_data["used_percent"], "disk_usage", threshold=0.1
-                )
-                anomalies.extend(disk_anomalies)
+                series.append((disk_data["used_percent"], "disk_usage", 0.1))
 
             # Analyze network traffic
-            net_data = self.get_metrics_data("net", "24h")
+            net_data = data["net"]
             if not net_data.empty:
                 if "bytes_recv" in net_data.columns:
-                    net_recv_anomalies = self.detect_univariate_anomalies(
-                        net_data["bytes_recv"], "network_recv", threshold=0.15
-                    )
-                    anomalies.extend(net_recv_anomalies)
+                    series.append((net_data["bytes_recv"], "network_recv", 0.15))
 
                 if "bytes_sent" in net_data.columns:
-                    net_sent_anomalies = self.detect_univariate_anomalies(
-                        net_data["bytes_sent"], "network_sent", threshold=0.15
-                    )
-                    anomalies.extend(net_sent_anomalies)
+                    series.append((net_data["bytes_sent"], "network_sent", 0.15))
+
+            anomalies.extend(self.detect_batched_anomalies(series))
 
         except Exception as e:
             logger.error(f"Error detecting system anomalies: {e}")
 
         return anomalies
 
+    def detect_batched_anomalies(self, metrics: list):
+        """Detect anomalies across several univariate series at once
+
+        ``metrics`` is a list of ``(data, metric_name, threshold)`` tuples.
+        Each series is standardized so metrics with different units share one
+        feature scale, then all series with the same contamination threshold
+        are fitted and scored by a single IsolationForest call and the
+        predictions are split back out per metric.
+        """
+        anomalies = []
+        groups = {}
+
+        for data, metric_name, threshold in metrics:
+            data = data.dropna()
+            if len(data) < 10:
+                continue
+            groups.setdefault(threshold, []).append((data, metric_name))
+
+        for threshold, members in groups.items():
+            names = [metric_name for _, metric_name in members]
+            try:
+                model_key = f"{'_'.join(names)}_isolation"
+                X = self._feature_matrix(
+                    np.concatenate(
+                        [self._standardize(data.values) for data, _ in members]
+                    )
+                )
+
+                model = self._get_isolation_model(model_key, X, threshold)
+                predictions, scores = self._score_isolation(model_key, model, X)
+
+                # Demultiplex the batched results back into per-metric slices
+                bounds = np.cumsum([len(data) for data, _ in members])[:-1]
+                for (data, metric_name), metric_predictions, metric_scores in zip(
+                    members, np.split(predictions, bounds), np.split(scores, bounds)
+                ):
+                    anomalies.extend(
+                        self._collect_anomalies(
+                            data, metric_name, metric_predictions, metric_scores
+                        )
+                    )
+
+            except Exception as e:
+                logger.error(f"Error detecting anomalies for {', '.join(names)}: {e}")
+
+        return anomalies
+
     def detect_univariate_anomalies(
         self, data: pd.Series, metric_name: str, threshold: float = 0.1
     ):
@@ -169,41 +526,187 @@ class MLAnalytics:
                 return anomalies
 
             # Use Isolation Forest for anomaly detection
+            X = self._feature_matrix(data.values)
             model_key = f"{metric_name}_isolation"
+            model = self._get_isolation_model(model_key, X, threshold)
+            predictions, scores = self._score_isolation(model_key, model, X)
 
-            if model_key not in self.models:
-                self.models[model_key] = IsolationForest(
-                    contamination=threshold, random_state=42, n_estimators=100
-                )
-
-                # Fit model
-                X = data.values.reshape(-1, 1)
-                self.models[model_key].fit(X)
-
-            # Predict anomalies
-            X = data.values.reshape(-1, 1)
-            predictions = self.models[model_key].predict(X)
-            scores = self.models[model_key].decision_function(X)
-
-            # Find anomalies (prediction = -1)
-            anomaly_indices = np.where(predictions == -1)[0]
-
-            for idx in anomaly_indices:
-                anomaly = {
-                    "metric": metric_name,
-                    "timestamp": data.index[idx].isoformat(),
-                    "value": float(data.iloc[idx]),
-                    "anomaly_score": float(scores[idx]),
-                    "severity": "high" if scores[idx] < -0.5 else "medium",
-                    "type": "statistical_anomaly",
-                }
-                anomalies.append(anomaly)
+            anomalies = self._collect_anomalies(data, metric_name, predictions, scores)
 
         except Exception as e:
             logger.error(f"Error detecting anomalies for {metric_name}: {e}")
 
         return anomalies
 
+    @staticmethod
+    def _bucket_sums(series: pd.Series, every: str) -> pd.Series:
+        """Sum a time-indexed series into fixed epoch-aligned buckets
+
+        Equivalent to ``series.resample(every).sum()`` for fixed-width
+        buckets (empty buckets are 0, NaN counts as 0), but done as a
+        single np.bincount over integer bucket offsets instead of going
+        through the pandas resampler.
+        """
+        if series.empty:
+            return series
+
+        width = pd.Timedelta(every).value
+        bucket = series.index.as_unit("ns").asi8 // width
+        first = bucket.min()
+        sums = np.bincount(
+            bucket - first, weights=np.nan_to_num(series.to_numpy(np.float64))
+        )
+
+        return pd.Series(
+            sums,
+            index=pd.to_datetime((first + np.arange(len(sums))) * width, utc=True),
+            name=series.name,
+        )
+
+    @staticmethod
+    def _standardize(values: np.ndarray) -> np.ndarray:
+        """Scale a series to zero mean and unit variance"""
+        std = values.std()
+        return (values - values.mean()) / (std if std > 0 else 1.0)
+
+    @staticmethod
+    def _feature_matrix(values: np.ndarray) -> np.ndarray:
+        """Shape values as a C-contiguous float32 column for the tree models
+
+        scikit-learn's tree code works on float32 internally, so handing it
+        float32 up front avoids a silent conversion copy on every fit and
+        predict call.
+        """
+        return np.ascontiguousarray(values, dtype=np.float32).reshape(-1, 1)
+
+    def _get_isolation_model(self, model_key: str, X: np.ndarray, threshold: float):
+        """Return the Isolation Forest for model_key, fitting it when stale
+
+        Fitted models are persisted under model_path, versioned by the
+        MODEL_RETRAIN_INTERVAL bucket, so a restarted process memory-maps the
+        current model from disk instead of re-fitting it, and retraining only
+        happens once per interval.
+        """
+        bucket = int(time.time() // MODEL_RETRAIN_INTERVAL)
+        if self.model_buckets.get(model_key) == bucket:
+            return self.models[model_key]
+
+        path = os.path.join(self.model_path, f"{model_key}_{bucket}.joblib")
+        if os.path.exists(path):
+            model = joblib.load(path, mmap_mode="r")
+        else:
+            model = IsolationForest(
+                contamination=threshold,
+                random_state=42,
+                n_estimators=100,
+                max_samples=256,
+                max_features=1,
+                bootstrap=False,
+                n_jobs=1,
+            )
+            with warnings.catch_warnings():
+                # Short windows trip the max_samples > n_samples notice
+                warnings.simplefilter("ignore", UserWarning)
+                model.fit(X)
+
+            # Uncompressed so the arrays can be memory-mapped on reload
+            joblib.dump(model, path)
+            for stale in glob.glob(
+                os.path.join(self.model_path, f"{model_key}_*.joblib")
+            ):
+                if stale != path:
+                    os.remove(stale)
+
+        # Fit single-threaded, but let prediction use every core
+        model.set_params(n_jobs=-1)
+
+        self.models[model_key] = model
+        self.model_buckets[model_key] = bucket
+        if njit is not None:
+            self.forests[model_key] = self._flatten_forest(model)
+        return model
+
+    @staticmethod
+    def _flatten_forest(model) -> dict:
+        """Pack the fitted trees into padded (n_trees, max_nodes) arrays
+
+        This is the layout consumed by the compiled _forest_path_lengths
+        evaluator; leaves keep -1 children just like scikit-learn's trees.
+        The average path length correction for each node is gathered from a
+        lookup table once here rather than recomputed on every scoring pass.
+        """
+        lut = _average_path_length_lut(model.max_samples_)
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        shape = (len(trees), max(tree.node_count for tree in trees))
+
+        features = np.zeros(shape, dtype=np.int64)
+        thresholds = np.zeros(shape, dtype=np.float64)
+        left = np.full(shape, -1, dtype=np.int64)
+        right = np.full(shape, -1, dtype=np.int64)
+        path_correction = np.zeros(shape, dtype=np.float64)
+
+        for t, (tree, tree_features) in enumerate(
+            zip(trees, model.estimators_features_)
+        ):
+            n = tree.node_count
+            # Map each tree's feature subset back onto the columns of X
+            features[t, :n] = np.asarray(tree_features)[np.maximum(tree.feature, 0)]
+            thresholds[t, :n] = tree.threshold
+            left[t, :n] = tree.children_left
+            right[t, :n] = tree.children_right
+            path_correction[t, :n] = lut[tree.n_node_samples]
+
+        return {
+            "arrays": (features, thresholds, left, right, path_correction),
+            "denominator": len(trees) * lut[model.max_samples_],
+            "offset": model.offset_,
+        }
+
+    def _score_isolation(self, model_key: str, model, X: np.ndarray):
+        """Return Isolation Forest predictions and decision scores for X
+
+        When numba is available the flattened forest is evaluated by the
+        compiled, sample-parallel _forest_path_lengths loop, reproducing
+        IsolationForest.decision_function without scikit-learn's per-tree
+        Python overhead. Otherwise scoring runs under joblib's threading
+        backend so the trees are evaluated in parallel against the shared
+        (memory-mapped) model arrays. Predictions are derived from the
+        decision scores exactly as IsolationForest.predict does, so the
+        forest is only traversed once.
+        """
+        forest = self.forests.get(model_key)
+        if forest is not None:
+            with _FOREST_SCORING_LOCK:
+                depths = _forest_path_lengths(X, *forest["arrays"])
+            scores = -(2.0 ** (-depths / forest["denominator"])) - forest["offset"]
+        else:
+            with joblib.parallel_backend("threading", n_jobs=-1):
+                scores = model.decision_function(X)
+
+        return np.where(scores < 0, -1, 1), scores
+
+    @staticmethod
+    def _collect_anomalies(
+        data: pd.Series, metric_name: str, predictions: np.ndarray, scores: np.ndarray
+    ):
+        """Build anomaly records for every sample predicted as an outlier"""
+        # Find anomalies (prediction = -1)
+        mask = predictions == -1
+        flagged_scores = scores[mask]
+
+        return pd.DataFrame(
+            {
+                "metric": metric_name,
+                "timestamp": np.datetime_as_string(
+                    data.index.values[mask], unit="s", timezone="UTC"
+                ),
+                "value": data.to_numpy(dtype=np.float64)[mask],
+                "anomaly_score": flagged_scores.astype(np.float64),
+                "severity": np.where(flagged_scores < -0.5, "high", "medium"),
+                "type": "statistical_anomaly",
+            }
+        ).to_dict("records")
+
     def predict_resource_usage(self):
         """Predict future resource usage trends"""
         logger.info("Generating resource usage predictions...")
@@ -211,30 +714,34 @@ class MLAnalytics:
         predictions = []
 
         try:
+            cpu_idle, mem_used, disk_used = self.get_aggregated_batch(
+                [
+                    ("cpu", "usage_idle", "mean", "1h", "72h"),
+                    ("mem", "used_percent", "mean", "1h", "72h"),
+                    ("disk", "used_percent", "mean", "1h", "72h"),
+                ]
+            )
+
             # Predict CPU usage
-            cpu_data = self.get_metrics_data("cpu", "72h")
-            if not cpu_data.empty and "usage_idle" in cpu_data.columns:
-                cpu_usage = 100 - cpu_data["usage_idle"].fillna(0)
+            if not cpu_idle.empty:
                 cpu_pred = self.create_trend_prediction(
-                    cpu_usage, "cpu_usage", hours_ahead=24
+                    100 - cpu_idle, "cpu_usage", hours_ahead=24
                 )
                 if cpu_pred:
                     predictions.append(cpu_pred)
 
             # Predict memory usage
-            mem_data = self.get_metrics_data("mem", "72h")
-            if not mem_data.empty and "used_percent" in mem_data.columns:
+            if not mem_used.empty:
                 mem_pred = self.create_trend_prediction(
-                    mem_data["used_percent"], "memory_usage", hours_ahead=24
+                    mem_used, "memory_usage", hours_ahead=24
                 )
                 if mem_pred:
                     predictions.append(mem_pred)
 
             # Predict disk usage
-            disk_data = self.get_metrics_data("disk", "72h")
-            if not disk_data.empty and "used_percent" in disk_data.columns:
+            if not disk_used.empty:
                 disk_pred = self.create_trend_prediction(
-                    disk_data["used_percent"], "disk_usage", hours_ahead=24
+                    disk_used, "disk_usage", hours_ahead=24
                 )
                 if disk_pred:
                     predictions.append(disk_pred)
@@ -247,34 +754,30 @@ class MLAnalytics:
     def create_trend_prediction(
         self, data: pd.Series, metric_name: str, hours_ahead: int = 24
     ):
-        """Create trend-based predictions using linear regression"""
-        try:
-            if len(data) < 50:
-                return None
+        """Create trend-based predictions using linear regression
 
-            # Prepare data
-            data = data.dropna().resample("1H").mean()  # Hourly averages
+        ``data`` is expected to be hourly, as returned by get_aggregated_batch.
+        """
+        try:
+            data = data.dropna()
             if len(data) < 20:
                 return None
 
-            # Create features (time-based)
-            X = np.arange(len(data)).reshape(-1, 1)
-            y = data.values
+            # Fit a least-squares line over the hourly time index
+            y = data.to_numpy(dtype=np.float64)
+            x = np.arange(len(y), dtype=np.float64)
+            coeffs, residuals, *_ = np.polyfit(x, y, 1, full=True)
 
-            # Train model
             model_key = f"{metric_name}_trend"
-            if model_key not in self.models:
-                self.models[model_key] = LinearRegression()
-
-            self.models[model_key].fit(X, y)
+            self.models[model_key] = tuple(coeffs)
 
             # Make predictions
-            future_X = np.arange(len(data), len(data) + hours_ahead).reshape(-1, 1)
-            predictions = self.models[model_key].predict(future_X)
+            future_x = np.arange(len(y), len(y) + hours_ahead, dtype=np.float64)
+            predictions = np.polyval(coeffs, future_x)
 
-            # Calculate confidence intervals
-            train_predictions = self.models[model_key].predict(X)
-            mse = mean_squared_error(y, train_predictions)
+            # Calculate confidence intervals from the fit's residual sum of
+            # squares rather than re-evaluating the line over the training set
+            mse = float(residuals[0]) / len(y) if residuals.size else 0.0
             std_error = np.sqrt(mse)
 
             # Generate prediction timestamps
@@ -297,16 +800,14 @@ class MLAnalytics:
                     }
                     for i in range(len(predictions))
                 ],
-                "model_accuracy": float(
-                    1 - (mse / np.var(y))
-                ),  # R-squared approximation
+                "model_accuracy": float(1 - (mse / y.var())),  # R-squared approximation
                 "trend": (
                     "increasing" if predictions[-1] > predictions[0] else "decreasing"
                 ),
             }
 
             # Generate alerts for concerning trends
-            max_pred = max(predictions)
+            max_pred = predictions.max()
             if (
                 metric_name in ["cpu_usage", "memory_usage", "disk_usage"]
                 and max_pred > 90
@@ -333,55 +834,49 @@ class MLAnalytics:
             # Get container metrics from Prometheus via InfluxDB (if available)
             # This is a placeholder for container-specific analysis
             container_data = self.get_metrics_data(
-                "docker_container_cpu", "24h", "telegraf"
+                "docker_container_cpu",
+                ["usage_percent"],
+                "24h",
+                "telegraf",
+                tags=["container_name"],
             )
 
-            if not container_data.empty:
-                # Analyze container resource patterns
-                for container in container_data.get(
-                    "container_name", pd.Series()
-                ).unique():
-                    if pd.isna(container):
-                        continue
-
-                    container_subset = container_data[
-                        container_data["container_name"] == container
+            if "container_name" in container_data.columns:
+                # One hashed pass over all containers instead of a mask per name
+                stats = (
+                    container_data.groupby("container_name", sort=False)[
+                        "usage_percent"
                     ]
+                    .agg(avg="mean", maxv="max", vol="std")
+                    .dropna(subset=["avg"])
+                )
+                priorities = np.select(
+                    [stats["avg"] > 80, stats["avg"] < 10],
+                    ["high", "low"],
+                    default="normal",
+                )
+                recommendations = {
+                    "high": "Consider increasing CPU resources",
+                    "low": "Container may be over-provisioned",
+                }
+                timestamp = datetime.utcnow().isoformat()
 
-                    if (
-                        not container_subset.empty
-                        and "usage_percent" in container_subset.columns
-                    ):
-                        avg_cpu = container_subset["usage_percent"].mean()
-                        max_cpu = container_subset["usage_percent"].max()
-
-                        insight = {
-                            "type": "container_analysis",
-                            "container": container,
-                            "avg_cpu_usage": float(avg_cpu),
-                            "max_cpu_usage": float(max_cpu),
-                            "cpu_volatility": float(
-                                container_subset["usage_percent"].std()
-                            ),
-                            "analysis_period": "24h",
-                            "timestamp": datetime.utcnow().isoformat(),
-                        }
-
-                        # Add recommendations
-                        if avg_cpu > 80:
-                            insight["recommendation"] = (
-                                "Consider increasing CPU resources"
-                            )
-                            insight["priority"] = "high"
-                        elif avg_cpu < 10:
-                            insight["recommendation"] = (
-                                "Container may be over-provisioned"
-                            )
-                            insight["priority"] = "low"
-                        else:
-                            insight["priority"] = "normal"
-
-                        insights.append(insight)
+                for (container, avg_cpu, max_cpu, volatility), priority in zip(
+                    stats.itertuples(index=True, name=None), priorities
+                ):
+                    insight = {
+                        "type": "container_analysis",
+                        "container": container,
+                        "avg_cpu_usage": float(avg_cpu),
+                        "max_cpu_usage": float(max_cpu),
+                        "cpu_volatility": float(volatility),
+                        "analysis_period": "24h",
+                        "timestamp": timestamp,
+                    }
+                    if priority in recommendations:
+                        insight["recommendation"] = recommendations[priority]
+                    insight["priority"] = str(priority)
+                    insights.append(insight)
 
         except Exception as e:
             logger.error(f"Error analyzing container behavior: {e}")
@@ -397,13 +892,15 @@ class MLAnalytics:
         try:
             # Get security data
             security_data = self.get_metrics_data(
-                "security_threat", "48h", "security_monitoring"
+                "security_threat", ["threat_count"], "48h", "security_monitoring"
             )
 
             if not security_data.empty:
                 # Analyze threat frequency patterns
                 if "threat_count" in security_data.columns:
-                    hourly_threats = security_data["threat_count"].resample("1H").sum()
+                    hourly_threats = self._bucket_sums(
+                        security_data["threat_count"], "1h"
+                    )
 
                     # Detect unusual security activity
                     if len(hourly_threats) > 12:  # At least 12 hours of data
@@ -424,10 +921,13 @@ class MLAnalytics:
 
             # Analyze file integrity violations
             file_data = self.get_metrics_data(
-                "file_integrity_violation", "48h", "security_monitoring"
+                "file_integrity_violation",
+                ["violation_count"],
+                "48h",
+                "security_monitoring",
             )
             if not file_data.empty and "violation_count" in file_data.columns:
-                daily_violations = file_data["violation_count"].resample("1D").sum()
+                daily_violations = self._bucket_sums(file_data["violation_count"], "1D")
 
                 if len(daily_violations) > 1:
                     avg_violations = daily_violations.mean()
@@ -457,14 +957,19 @@ class MLAnalytics:
         insights = []
 
         try:
+            cpu_idle, daily_traffic = self.get_aggregated_batch(
+                [
+                    ("cpu", "usage_idle", "mean", "1h", "7d"),
+                    ("net", "bytes_recv", "sum", "1d", "7d"),
+                ]
+            )
+
             # Resource utilization insights
-            cpu_data = self.get_metrics_data("cpu", "7d")
-            if not cpu_data.empty and "usage_idle" in cpu_data.columns:
-                cpu_usage = 100 - cpu_data["usage_idle"].fillna(0)
+            if not cpu_idle.empty:
+                hourly_avg = 100 - cpu_idle
 
                 # Daily patterns
-                daily_avg = cpu_usage.resample("1D").mean()
-                hourly_avg = cpu_usage.resample("1H").mean()
+                daily_avg = hourly_avg.resample("1D").mean()
 
                 # Peak hours analysis
                 peak_hour = hourly_avg.groupby(hourly_avg.index.hour).mean().idxmax()
@@ -495,35 +1000,31 @@ class MLAnalytics:
                 insights.append(insight)
 
             # Network performance insights
-            net_data = self.get_metrics_data("net", "7d")
-            if not net_data.empty and "bytes_recv" in net_data.columns:
-                daily_traffic = net_data["bytes_recv"].resample("1D").sum()
-
-                if len(daily_traffic) > 1:
-                    insight = {
-                        "type": "performance_insight",
-                        "metric": "network_traffic",
-                        "daily_average_bytes": float(daily_traffic.mean()),
-                        "peak_day_bytes": float(daily_traffic.max()),
-                        "traffic_growth": (
-                            float(
-                                (daily_traffic.iloc[-1] - daily_traffic.iloc[0])
-                                / daily_traffic.iloc[0]
-                                * 100
-                            )
-                            if daily_traffic.iloc[0] > 0
-                            else 0
-                        ),
-                        "timestamp": datetime.utcnow().isoformat(),
-                    }
-
-                    if insight["traffic_growth"] > 50:
-                        insight["recommendation"] = (
-                            "Network traffic growing rapidly - monitor bandwidth utilization"
+            if len(daily_traffic) > 1:
+                insight = {
+                    "type": "performance_insight",
+                    "metric": "network_traffic",
+                    "daily_average_bytes": float(daily_traffic.mean()),
+                    "peak_day_bytes": float(daily_traffic.max()),
+                    "traffic_growth": (
+                        float(
+                            (daily_traffic.iloc[-1] - daily_traffic.iloc[0])
+                            / daily_traffic.iloc[0]
+                            * 100
                         )
-                        insight["priority"] = "medium"
+                        if daily_traffic.iloc[0] > 0
+                        else 0
+                    ),
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
 
-                    insights.append(insight)
+                if insight["traffic_growth"] > 50:
+                    insight["recommendation"] = (
+                        "Network traffic growing rapidly - monitor bandwidth utilization"
+                    )
+                    insight["priority"] = "medium"
+
+                insights.append(insight)
 
         except Exception as e:
             logger.error(f"Error generating insights: {e}")
@@ -538,108 +1039,128 @@ class MLAnalytics:
             return
 
         try:
-            points = []
-            timestamp = datetime.utcnow()
-
-            # Switch to ML database
-            self.client.switch_database(ML_DATABASE)
+            timestamp = time.time_ns()
+            line = self._line_point
+            lines = []
 
             # Store anomalies
             for anomaly in anomalies:
-                point = {
-                    "measurement": "ml_anomaly",
-                    "tags": {
-                        "metric": anomaly["metric"],
-                        "type": anomaly["type"],
-                        "severity": anomaly["severity"],
-                    },
-                    "fields": {
-                        "value": anomaly["value"],
-                        "anomaly_score": anomaly["anomaly_score"],
-                        "anomaly_count": 1,
-                    },
-                    "time": timestamp,
-                }
-                points.append(point)
+                lines.append(
+                    line(
+                        "ml_anomaly",
+                        {
+                            "metric": anomaly["metric"],
+                            "type": anomaly["type"],
+                            "severity": anomaly["severity"],
+                        },
+                        {
+                            "value": anomaly["value"],
+                            "anomaly_score": anomaly["anomaly_score"],
+                            "anomaly_count": 1,
+                        },
+                        timestamp,
+                    )
+                )
 
             # Store predictions summary
             for prediction in predictions:
                 if prediction and "predictions" in prediction:
-                    # Store prediction summary
-                    point = {
-                        "measurement": "ml_prediction",
-                        "tags": {
-                            "metric": prediction["metric"],
-                            "prediction_type": prediction["prediction_type"],
-                            "trend": prediction.get("trend", "unknown"),
-                        },
-                        "fields": {
-                            "forecast_hours": prediction["forecast_hours"],
-                            "model_accuracy": prediction["model_accuracy"],
-                            "has_alert": 1 if "alert" in prediction else 0,
-                        },
-                        "time": timestamp,
-                    }
-                    points.append(point)
+                    lines.append(
+                        line(
+                            "ml_prediction",
+                            {
+                                "metric": prediction["metric"],
+                                "prediction_type": prediction["prediction_type"],
+                                "trend": prediction.get("trend", "unknown"),
+                            },
+                            {
+                                "forecast_hours": prediction["forecast_hours"],
+                                "model_accuracy": prediction["model_accuracy"],
+                                "has_alert": 1 if "alert" in prediction else 0,
+                            },
+                            timestamp,
+                        )
+                    )
 
             # Store insights
             for insight in insights:
-                point = {
-                    "measurement": "ml_insight",
-                    "tags": {
-                        "type": insight["type"],
-                        "metric": insight.get("metric", "general"),
-                        "priority": insight.get("priority", "normal"),
-                    },
-                    "fields": {
-                        "insight_count": 1,
-                        "has_recommendation": 1 if "recommendation" in insight else 0,
-                    },
-                    "time": timestamp,
-                }
-                points.append(point)
+                lines.append(
+                    line(
+                        "ml_insight",
+                        {
+                            "type": insight["type"],
+                            "metric": insight.get("metric", "general"),
+                            "priority": insight.get("priority", "normal"),
+                        },
+                        {
+                            "insight_count": 1,
+                            "has_recommendation": (
+                                1 if "recommendation" in insight else 0
+                            ),
+                        },
+                        timestamp,
+                    )
+                )
 
             # Store security patterns
             for pattern in patterns:
-                point = {
-                    "measurement": "ml_security_pattern",
-                    "tags": {
-                        "pattern_type": pattern["type"],
-                        "pattern_name": pattern["pattern_name"],
-                        "severity": pattern["severity"],
-                    },
-                    "fields": {"pattern_count": 1},
-                    "time": timestamp,
-                }
-                points.append(point)
+                lines.append(
+                    line(
+                        "ml_security_pattern",
+                        {
+                            "pattern_type": pattern["type"],
+                            "pattern_name": pattern["pattern_name"],
+                            "severity": pattern["severity"],
+                        },
+                        {"pattern_count": 1},
+                        timestamp,
+                    )
+                )
 
             # Store summary metrics
-            summary_point = {
-                "measurement": "ml_analysis_summary",
-                "tags": {"analysis_type": "comprehensive"},
-                "fields": {
-                    "anomalies_detected": len(anomalies),
-                    "predictions_generated": len(predictions),
-                    "insights_created": len(insights),
-                    "security_patterns": len(patterns),
-                    "analysis_duration": 0,  # Placeholder
-                },
-                "time": timestamp,
-            }
-            points.append(summary_point)
+            lines.append(
+                line(
+                    "ml_analysis_summary",
+                    {"analysis_type": "comprehensive"},
+                    {
+                        "anomalies_detected": len(anomalies),
+                        "predictions_generated": len(predictions),
+                        "insights_created": len(insights),
+                        "security_patterns": len(patterns),
+                        "analysis_duration": 0,  # Placeholder
+                    },
+                    timestamp,
+                )
+            )
 
-            if points:
-                self.client.write_points(points)
-                logger.info(f"Stored {len(points)} ML analysis results in InfluxDB")
+            self.client.write_points(lines, database=ML_DATABASE, protocol="line")
+            logger.info(f"Stored {len(lines)} ML analysis results in InfluxDB")
 
         except Exception as e:
             logger.error(f"Error storing ML results: {e}")
 
+    @staticmethod
+    def _line_point(measurement: str, tags: dict, fields: dict, ts_ns: int) -> str:
+        """Format one point as an InfluxDB line protocol record
+
+        Writing line protocol directly skips the per-point dicts and the
+        client's own serialization pass. Field types match what the client
+        would send for the same values (ints as ``i``, numbers as floats),
+        so existing series keep their field types.
+        """
+        tag_set = "".join(
+            f",{key}={str(value).translate(_LP_TAG_ESCAPES)}"
+            for key, value in tags.items()
+            if value not in (None, "")
+        )
+        field_set = ",".join(
+            f"{key}={_line_value(value)}" for key, value in fields.items()
+        )
+        return f"{measurement}{tag_set} {field_set} {ts_ns}"
+
     def send_ml_alerts(self, anomalies: list, predictions: list):
         """Send alerts for critical ML findings"""
         try:
-            import requests
-
             # Count high-severity findings
             high_anomalies = [a for a in anomalies if a["severity"] == "high"]
             critical_predictions = [
@@ -666,8 +1187,8 @@ class MLAnalytics:
                     ]
                 }
 
-                response = requests.post(
-                    "http://slack-notifier:5001/webhook", json=alert_data, timeout=5
+                response = self._http.post(
+                    ALERT_WEBHOOK_URL, json=alert_data, timeout=HTTP_TIMEOUT
                 )
 
                 if response.status_code == 200:
@@ -678,38 +1199,58 @@ class MLAnalytics:
         except Exception as e:
             logger.error(f"Error sending ML alerts: {e}")
 
-    def run_ml_analysis(self):
+    async def run_ml_analysis(self):
         """Run comprehensive ML analysis"""
         logger.info("Starting ML analysis cycle...")
 
-        try:
-            start_time = time.time()
-
-            # Detect anomalies
-            anomalies = self.detect_system_anomalies()
+        latest = await asyncio.to_thread(self._latest_timestamps)
+        if latest and latest == self._last_max_ts:
+            logger.info("No new metrics since the last cycle, skipping analysis")
+            return None
 
-            # Generate predictions
-            predictions = self.predict_resource_usage()
+        # Metrics memoized by the previous cycle are stale now
+        self._cycle_cache.clear()
 
-            # Analyze container behavior
-            container_insights = self.analyze_container_behavior()
+        # Warm the cache up front so concurrent stages reading the same
+        # aggregates share one query instead of each missing the cache
+        await asyncio.to_thread(
+            self.get_aggregated_batch,
+            [spec + (CYCLE_CACHE_RANGE,) for spec in PREFETCH_AGGREGATES],
+        )
 
-            # Detect security patterns
-            security_patterns = self.detect_security_patterns()
+        try:
+            start_time = time.time()
 
-            # Generate performance insights
-            performance_insights = self.generate_performance_insights()
+            # The stages are independent and mostly wait on InfluxDB, so
+            # overlap them on worker threads instead of running back to back
+            (
+                anomalies,
+                predictions,
+                container_insights,
+                security_patterns,
+                performance_insights,
+            ) = await asyncio.gather(
+                asyncio.to_thread(self.detect_system_anomalies),
+                asyncio.to_thread(self.predict_resource_usage),
+                asyncio.to_thread(self.analyze_container_behavior),
+                asyncio.to_thread(self.detect_security_patterns),
+                asyncio.to_thread(self.generate_performance_insights),
+            )
 
             # Combine insights
             all_insights = container_insights + performance_insights
 
             # Store results
-            self.store_ml_results(
-                anomalies, predictions, all_insights, security_patterns
+            await asyncio.to_thread(
+                self.store_ml_results,
+                anomalies,
+                predictions,
+                all_insights,
+                security_patterns,
             )
 
             # Send alerts if needed
-            self.send_ml_alerts(anomalies, predictions)
+            await asyncio.to_thread(self.send_ml_alerts, anomalies, predictions)
 
             analysis_duration = time.time() - start_time
 
@@ -719,6 +1260,9 @@ class MLAnalytics:
                 f"{len(security_patterns)} security patterns (took {analysis_duration:.2f}s)"
             )
 
+            # Only a completed cycle counts as having seen this data
+            self._last_max_ts = latest
+
             return {
                 "anomalies": anomalies,
                 "predictions": predictions,
@@ -731,7 +1275,7 @@ class MLAnalytics:
             logger.error(f"Error in ML analysis: {e}")
             return None
 
-    def run_continuous_analysis(self):
+    async def run_continuous_analysis(self):
         """Run continuous ML analysis"""
         logger.info(
             f"Starting continuous ML analysis (interval: {ANALYSIS_INTERVAL}s)..."
@@ -739,17 +1283,17 @@ class MLAnalytics:
 
         while True:
             try:
-                self.run_ml_analysis()
-                time.sleep(ANALYSIS_INTERVAL)
+                await self.run_ml_analysis()
+                await asyncio.sleep(ANALYSIS_INTERVAL)
 
-            except KeyboardInterrupt:
-                logger.info("Stopping ML analytics")
-                break
             except Exception as e:
                 logger.error(f"Error in continuous analysis: {e}")
-                time.sleep(60)  # Wait 1 minute before retrying
+                await asyncio.sleep(60)  # Wait 1 minute before retrying
 
 
 if __name__ == "__main__":
     analytics = MLAnalytics()
-    analytics.run_continuous_analysis()
+    try:
+        asyncio.run(analytics.run_continuous_analysis())
+    except KeyboardInterrupt:
+        logger.info("Stopping ML analytics")
@@ -4,49 +4,226 @@ Secrets Helper Module for ML/Analytics services
 Provides secure secret retrieval and connection URL helpers.
 """
 
+from __future__ import annotations
+
 import os
-import pathlib
-from typing import Optional
+import threading
+from collections.abc import Iterable
+from functools import lru_cache
 
+SECRETS_DIR = "/secrets"
 
-def read_secret(
-    secret_name: str, fallback_env: Optional[str] = None, required: bool = True
-) -> Optional[str]:
-    """
-    Read a secret from the secrets directory or fall back to env vars.
+# Secrets the services declare, preloaded in one pass over SECRETS_DIR;
+# other names are read individually when first requested
+_SECRET_MANIFEST = frozenset(
+    {
+        "influxdb_admin_password",
+        "zabbix_db_password",
+        "slack_webhook_url",
+        "unraid_api_key",
+    }
+)
 
-    Args:
-        secret_name: Name of the secret file (e.g., "influxdb_admin_password").
-        fallback_env: Environment variable name to use as a fallback.
-        required: If True, raise when not found; otherwise return None.
+# Resolved secrets keyed by (secret_name, fallback_env). Misses are stored
+# as None so absent optional secrets do not hit the filesystem again.
+_secret_cache = {}
+_NOT_CACHED = object()
+# Serializes cache fills and invalidation; hits stay lock-free
+_cache_lock = threading.Lock()
 
-    Returns:
-        The secret value as a string, or None when not required and missing.
+
+def _read_secret_file(path: str) -> str | None:
+    """Return the stripped contents of a secret file, or None if unreadable."""
+    try:
+        # Unbuffered since the file is read in a single call; trim the raw
+        # bytes so only the final value is decoded
+        with open(path, "rb", buffering=0) as f:
+            return f.read().strip().decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+@lru_cache(maxsize=1)
+def _load_secret_files() -> dict:
+    """Read the manifest secrets in SECRETS_DIR in one pass over scandir.
+
+    Returns a mapping of file name to stripped contents. Only names in
+    _SECRET_MANIFEST are opened, so unrelated files on the mount are never
+    read into memory. When the mount is absent (dev and CI) the mapping is
+    empty. Files that cannot be read or are not UTF-8 are left out.
     """
-    # Try reading from Docker secrets mount (or local test path via patched Path)
-    secret_path = pathlib.Path(f"/secrets/{secret_name}")
-    if secret_path.exists():
-        value = secret_path.read_text().strip()
-        if value:
-            return value
+    secrets = {}
+    try:
+        with os.scandir(SECRETS_DIR) as entries:
+            files = [
+                entry
+                for entry in entries
+                if entry.name in _SECRET_MANIFEST and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return secrets
+
+    for entry in files:
+        value = _read_secret_file(entry.path)
+        if value is not None:
+            secrets[entry.name] = value
+
+    return secrets
+
+
+def _lookup_secret(secret_name: str, fallback_env: str | None) -> str | None:
+    """Resolve a secret from the secrets mount or the environment."""
+    # Try the Docker secrets mount; manifest secrets are preloaded in one pass
+    if secret_name in _SECRET_MANIFEST:
+        value = _load_secret_files().get(secret_name)
+    else:
+        value = _read_secret_file(os.path.join(SECRETS_DIR, secret_name))
+    if value:
+        return value
+
+    env = os.environ
 
     # Fallback to provided environment variable
     if fallback_env:
-        env_value = os.environ.get(fallback_env)
+        env_value = env.get(fallback_env)
         if env_value:
             return env_value
 
     # Final fallback: direct env lookup by uppercased secret name
-    direct_env = os.environ.get(secret_name.upper())
+    direct_env = env.get(secret_name.upper())
     if direct_env:
         return direct_env
 
+    return None
+
+
+def _read_secret_cached(
+    secret_name: str, fallback_env: str | None = None
+) -> str | None:
+    """Resolve a secret once per (secret_name, fallback_env) pair.
+
+    Secrets do not change during the lifetime of a service, so the
+    filesystem and environment are only consulted on the first lookup.
+    Concurrent first lookups wait for a single fill instead of each
+    reading the mount.
+    """
+    key = (secret_name, fallback_env)
+    value = _secret_cache.get(key, _NOT_CACHED)
+    if value is not _NOT_CACHED:
+        return value
+
+    with _cache_lock:
+        value = _secret_cache.get(key, _NOT_CACHED)
+        if value is _NOT_CACHED:
+            value = _secret_cache[key] = _lookup_secret(secret_name, fallback_env)
+    return value
+
+
+def _clear_derived_caches() -> None:
+    """Drop the directory listing and values built from secrets."""
+    _load_secret_files.cache_clear()
+    get_database_url.cache_clear()
+    get_api_key.cache_clear()
+    get_slack_webhook.cache_clear()
+
+
+def invalidate_secret(secret_name: str) -> None:
+    """Drop a cached secret so the next lookup re-reads it (e.g. on SIGHUP)."""
+    with _cache_lock:
+        _clear_derived_caches()
+        for key in [key for key in _secret_cache if key[0] == secret_name]:
+            del _secret_cache[key]
+
+
+def refresh_secrets_dir() -> None:
+    """Re-scan SECRETS_DIR and retry secrets that were previously missing.
+
+    Use after the secrets mount appears or changes at runtime.
+    """
+    with _cache_lock:
+        _clear_derived_caches()
+        for key in [key for key, value in _secret_cache.items() if value is None]:
+            del _secret_cache[key]
+
+
+def reset_secret_cache() -> None:
+    """Forget all cached secrets (e.g. between tests or after rotation)."""
+    with _cache_lock:
+        _clear_derived_caches()
+        _secret_cache.clear()
+
+
+@lru_cache(maxsize=64)
+def _missing_secret_message(secret_name: str) -> str:
+    """Error text for a missing required secret, formatted once per name."""
+    return f"Required secret '{secret_name}' not found"
+
+
+def read_secret(
+    secret_name: str, fallback_env: str | None = None, required: bool = True
+) -> str | None:
+    """
+    Read a secret from the secrets directory or fall back to env vars.
+
+    Args:
+        secret_name: Name of the secret file (e.g., "influxdb_admin_password").
+        fallback_env: Environment variable name to use as a fallback.
+        required: If True, raise when not found; otherwise return None.
+
+    Returns:
+        The secret value as a string, or None when not required and missing.
+    """
+    # Inline cache hit; only misses pay for the locked fill path
+    value = _secret_cache.get((secret_name, fallback_env), _NOT_CACHED)
+    if value is _NOT_CACHED:
+        value = _read_secret_cached(secret_name, fallback_env)
+    if value:
+        return value
+
     if required:
         # Match test expectation for error message wording
-        raise ValueError(f"Required secret '{secret_name}' not found")
+        raise ValueError(_missing_secret_message(secret_name))
     return None
 
 
+def read_secrets_bulk(names: Iterable[str]) -> dict[str, str | None]:
+    """
+    Read several secrets at once.
+
+    Each name is resolved like read_secret(name, required=False), from the
+    secrets mount or the uppercased env var, so callers needing a group of
+    manifest secrets pay for one directory pass instead of one lookup each.
+
+    Returns:
+        A dict mapping each name to its value, or None when missing.
+    """
+    return {name: _read_secret_cached(name) for name in names}
+
+
+# db_type -> (url format, user, host, port, db, password secret), where the
+# format is a bound str.format, each connection part is an (env var,
+# default) pair and the secret is a (secret_name, fallback_env) pair
+_DB_SPECS = {
+    "influxdb": (
+        "http://{auth}{host}:{port}{db}".format,
+        ("INFLUXDB_ADMIN_USER", "admin"),
+        ("INFLUXDB_HOST", "influxdb"),
+        ("INFLUXDB_PORT", "8086"),
+        ("INFLUXDB_DB", ""),
+        ("influxdb_admin_password", "INFLUXDB_ADMIN_PASSWORD"),
+    ),
+    "mysql": (
+        "mysql://{auth}{host}{db}".format,
+        ("ZABBIX_DB_USER", "root"),
+        ("ZABBIX_DB_HOST", "mysql"),
+        None,
+        ("ZABBIX_DB_NAME", ""),
+        ("zabbix_db_password", "ZABBIX_DB_PASSWORD"),
+    ),
+}
+
+
+@lru_cache(maxsize=8)
 def get_database_url(db_type: str = "influxdb") -> str:
     """
     Build a database connection URL using secrets and environment.
@@ -54,44 +231,41 @@ def get_database_url(db_type: str = "influxdb") -> str:
     Supported types:
       - influxdb: http://<user>:<pass>@<host>:<port>/<db>
       - mysql:    mysql://<user>:<pass>@<host>/<db>
+
+    URLs are cached per db_type; reset_secret_cache() (or
+    get_database_url.cache_clear()) forces them to be rebuilt.
     """
-    if db_type == "influxdb":
-        user = os.environ.get("INFLUXDB_ADMIN_USER", "admin")
-        host = os.environ.get("INFLUXDB_HOST", "influxdb")
-        port = os.environ.get("INFLUXDB_PORT", "8086")
-        db = os.environ.get("INFLUXDB_DB", "")
-        password = (
-            read_secret(
-                "influxdb_admin_password", "INFLUXDB_ADMIN_PASSWORD", required=False
-            )
-            or ""
-        )
-
-        auth = f"{user}:{password}@" if password else ""
-        suffix = f"/{db}" if db else ""
-        return f"http://{auth}{host}:{port}{suffix}"
-
-    if db_type == "mysql":
-        user = os.environ.get("ZABBIX_DB_USER", "root")
-        host = os.environ.get("ZABBIX_DB_HOST", "mysql")
-        db = os.environ.get("ZABBIX_DB_NAME", "")
-        password = (
-            read_secret("zabbix_db_password", "ZABBIX_DB_PASSWORD", required=False)
-            or ""
-        )
-
-        auth = f"{user}:{password}@" if password else ""
-        suffix = f"/{db}" if db else ""
-        return f"mysql://{auth}{host}{suffix}"
-
-    raise ValueError(f"Unsupported database type: {db_type}")
-
-
-def get_slack_webhook() -> Optional[str]:
+    spec = _DB_SPECS.get(db_type)
+    if spec is None:
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+    url_format, user_var, host_var, port_var, db_var, secret = spec
+    env = os.environ
+
+    password = read_secret(*secret, required=False)
+    db = env.get(*db_var)
+
+    return url_format(
+        auth="".join((env.get(*user_var), ":", password, "@")) if password else "",
+        host=env.get(*host_var),
+        port=env.get(*port_var) if port_var else "",
+        db="/" + db if db else "",
+    )
+
+
+@lru_cache(maxsize=1)
+def get_slack_webhook() -> str | None:
     """Return the Slack webhook URL if configured, else None."""
     return read_secret("slack_webhook_url", "SLACK_WEBHOOK_URL", required=False)
 
 
+# service -> (secret_name, fallback_env) holding its API key
+_API_KEY_SPECS = {
+    "unraid": ("unraid_api_key", "UNRAID_API_KEY"),
+}
+
+
+@lru_cache(maxsize=16)
 def get_api_key(service: str) -> str:
     """
     Retrieve API key for a given service.
@@ -99,10 +273,24 @@ def get_api_key(service: str) -> str:
     Currently supported services:
       - "unraid": secret file "unraid_api_key" or env "UNRAID_API_KEY".
     """
-    service = service.lower()
-    if service == "unraid":
-        value = read_secret("unraid_api_key", "UNRAID_API_KEY", required=True)
-        return value
+    spec = _API_KEY_SPECS.get(service.lower())
+    if spec is None:
+        # Match unit test expectation for invalid services
+        raise ValueError(f"Unknown service: {service.lower()}")
+    return read_secret(*spec, required=True)
+
+
+def _warmup() -> None:
+    """Resolve the secrets most services need ahead of their first use."""
+    try:
+        get_database_url("influxdb")
+        get_slack_webhook()
+    except (OSError, ValueError):
+        # Surface the problem on the first real lookup instead
+        pass
+
 
-    # Match unit test expectation for invalid services
-    raise ValueError(f"Unknown service: {service}")
+# Opt-in: services that connect to InfluxDB right away can set
+# ML_SECRETS_WARMUP=1 to overlap secret I/O with the rest of their imports
+if os.environ.get("ML_SECRETS_WARMUP") == "1":
+    threading.Thread(target=_warmup, name="secrets-warmup", daemon=True).start()
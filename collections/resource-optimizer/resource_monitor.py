@@ -5,17 +5,39 @@ Automatically monitors system resources and optimizes container performance
 """
 
 import docker
+import numpy as np
 import psutil
+import heapq
 import json
+import os
 import time
 import logging
+import queue
+import re
 import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-import requests
+from types import MappingProxyType
+import urllib3
+from urllib3.util.retry import Retry
 from dataclasses import dataclass
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
 # Import secrets helper
 try:
     import sys
@@ -28,8 +50,6 @@ try:
     )
 except ImportError:
     # Fallback for development
-    import os
-
     def read_secret(name, fallback=None, required=True):
         return os.environ.get(fallback, fallback)
 
@@ -43,20 +63,63 @@ except ImportError:
 # Configuration
 MONITORING_INTERVAL = 30  # seconds
 OPTIMIZATION_INTERVAL = 300  # 5 minutes
-RESOURCE_THRESHOLDS = {
-    "cpu_warning": 80.0,
-    "cpu_critical": 90.0,
-    "memory_warning": 85.0,
-    "memory_critical": 95.0,
-    "disk_warning": 80.0,
-    "disk_critical": 90.0,
-    "network_warning": 100_000_000,  # 100MB/s
-    "network_critical": 500_000_000,  # 500MB/s
-}
+RESOURCE_THRESHOLDS = MappingProxyType(
+    {
+        "cpu_warning": 80.0,
+        "cpu_critical": 90.0,
+        "memory_warning": 85.0,
+        "memory_critical": 95.0,
+        "disk_warning": 80.0,
+        "disk_critical": 90.0,
+        "network_warning": 100_000_000,  # 100MB/s
+        "network_critical": 500_000_000,  # 500MB/s
+    }
+)
+
+# Containers never restarted automatically; matched anywhere in the name
+# so compose-prefixed names like "maelstrom_influxdb_1" are covered
+_CRITICAL_SERVICE_RE = re.compile(
+    r"influxdb|grafana|prometheus|mysql|vault", re.IGNORECASE
+)
+
+# Streamed stats hold one docker API connection per running container
+STATS_STREAM_POOL_SIZE = 64
+# dockerd emits a sample per second; decode only about one per cycle
+STATS_STREAM_KEEP_EVERY = MONITORING_INTERVAL - 2  # seconds
+
+# Host cgroup and proc trees, mounted read-only into the container
+CGROUP_ROOT = os.getenv("CGROUP_ROOT", "/host/sys/fs/cgroup")
+PROC_ROOT = os.getenv("PROC_ROOT", "/host/proc")
 
 INFLUXDB_HOST = "influxdb"
 INFLUXDB_PORT = 8086
 INFLUXDB_DATABASE = "resource_monitoring"
+WRITE_BATCH_SIZE = 5000  # points per InfluxDB request
+WRITE_FLUSH_INTERVAL = 10  # seconds
+WRITE_BUFFER_MAX = 20000  # oldest points are dropped beyond this
+CONTAINER_STATS_WORKERS = 16  # concurrent stats calls against dockerd
+CONTAINER_STATS_DEADLINE = min(OPTIMIZATION_INTERVAL * 0.5, 20)  # seconds
+HISTORY_WINDOW = timedelta(hours=24)
+HISTORY_MAX = int(HISTORY_WINDOW.total_seconds() // MONITORING_INTERVAL)
+OPTIMIZATION_ACTIONS_MAX = 1000
+ALERT_REPEAT_AFTER = 3600  # seconds before a sent alert may fire again
+ALERT_MEMORY_MAX = 1024  # sent alerts remembered for de-duplication
+OUTPUT_QUEUE_SIZE = 4  # cycles waiting for storage, alerts and reports
+REPORT_DIR = Path("/app/reports")
+REPORT_EVERY_N_CYCLES = 10  # InfluxDB holds every cycle; reports are summaries
+REPORT_QUEUE_SIZE = 64
+# Container events that change what collect_container_metrics reports
+CONTAINER_EVENTS = [
+    "create",
+    "start",
+    "die",
+    "destroy",
+    "pause",
+    "unpause",
+    "rename",
+    "update",
+    "health_status",
+]
 
 # Setup logging
 logging.basicConfig(
@@ -65,7 +128,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ResourceMetrics:
     """Resource metrics data class"""
 
@@ -79,16 +142,377 @@ class ResourceMetrics:
     recommendations: List[str]
 
 
+def _host_usage(host_metrics: Dict) -> Tuple[float, float, float]:
+    """Return host (cpu, memory, disk) percent from collect_host_metrics()"""
+    cpu = host_metrics.get("cpu") or {}
+    memory = host_metrics.get("memory") or {}
+    disk = host_metrics.get("disk") or {}
+    return cpu.get("percent", 0), memory.get("percent", 0), disk.get("percent", 0)
+
+
+class _StatsStreamer:
+    """Keep the latest streamed stats sample for every running container
+
+    One daemon thread per container follows ``stats(stream=True)``. The
+    owner calls ``watch`` when a container starts and ``discard`` when it
+    stops; a reader also ends on its own when dockerd closes the stream.
+    """
+
+    def __init__(self):
+        # Dedicated client so long-lived streams don't exhaust the pool
+        # used for regular API calls
+        self.docker_client = docker.from_env(max_pool_size=STATS_STREAM_POOL_SIZE)
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._readers = {}
+
+    def start(self):
+        """Start readers for the containers running now"""
+        for container in self.docker_client.containers.list():
+            self._watch(container)
+
+    def latest(self, container_id: str) -> Optional[Dict]:
+        """Return the most recent stats sample for a container, if any"""
+        with self._lock:
+            return self._latest.get(container_id)
+
+    def watch(self, container_id: str):
+        """Start following a container that has just started"""
+        try:
+            self._watch(self.docker_client.containers.get(container_id))
+        except docker.errors.NotFound:
+            pass
+
+    def discard(self, container_id: str):
+        """Drop the sample of a stopped container; its reader exits with the stream"""
+        with self._lock:
+            self._latest.pop(container_id, None)
+
+    def _watch(self, container):
+        token = object()
+        with self._lock:
+            self._readers[container.id] = token
+
+        threading.Thread(
+            target=self._read_stream,
+            args=(container, token),
+            name=f"stats-{container.name}",
+            daemon=True,
+        ).start()
+
+    def _read_stream(self, container, token):
+        try:
+            # Samples are newline-delimited JSON; only the last complete one
+            # in each chunk is decoded since it supersedes the others, and
+            # chunks arriving before the next sample is due are not decoded
+            pending = b""
+            last_kept = None
+            for chunk in container.stats(stream=True, decode=False):
+                pending += chunk
+                *complete, pending = pending.split(b"\n")
+                complete = [line for line in complete if line.strip()]
+                if not complete:
+                    continue
+                now = time.monotonic()
+                if last_kept is not None and now - last_kept < STATS_STREAM_KEEP_EVERY:
+                    continue
+                last_kept = now
+                sample = _json_loads(complete[-1])
+                with self._lock:
+                    if self._readers.get(container.id) is not token:
+                        return
+                    self._latest[container.id] = sample
+        except Exception as e:
+            logger.debug(f"Stats stream for {container.name} ended: {e}")
+        finally:
+            with self._lock:
+                if self._readers.get(container.id) is token:
+                    del self._readers[container.id]
+                    self._latest.pop(container.id, None)
+
+
+def _is_transient_write_error(error: Exception) -> bool:
+    """Whether a failed InfluxDB write may succeed when retried
+
+    Connection errors, timeouts and 5xx responses can clear up; a 4xx such
+    as a field type conflict or a malformed point fails on every retry.
+    """
+    # Only reached once the client was created, so influxdb is installed
+    import requests
+    from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
+
+    if isinstance(error, InfluxDBClientError):
+        return error.code is not None and error.code >= 500
+    return isinstance(
+        error,
+        (
+            InfluxDBServerError,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ),
+    )
+
+
+def _read_file(path: str) -> bytes:
+    """Read a small sysfs/procfs file in a single unbuffered call"""
+    with open(path, "rb", buffering=0) as f:
+        return f.read()
+
+
+class _CgroupStats:
+    """Build container stats samples from cgroup and procfs files
+
+    Produces the subset of the Docker stats API layout used by the monitor
+    without a round-trip through dockerd. Supports cgroup v2 and v1 with
+    either the systemd or cgroupfs driver. ``read`` returns None when a
+    container's cgroup cannot be found, so callers can fall back to the API.
+    """
+
+    # Relative cgroup directories for a container id, per driver
+    _LAYOUTS = ("system.slice/docker-{id}.scope", "docker/{id}")
+
+    def __init__(self):
+        self.version = None
+        if os.path.exists(f"{CGROUP_ROOT}/cgroup.controllers"):
+            self.version = 2
+        elif os.path.isdir(f"{CGROUP_ROOT}/memory"):
+            self.version = 1
+        self._host_memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        self._online_cpus = os.cpu_count() or 1
+        self._ns_per_tick = 1e9 / os.sysconf("SC_CLK_TCK")
+        # container id -> (cpu usage ns, system cpu ns) at the previous read
+        self._previous = {}
+
+    def available(self, containers) -> bool:
+        """Whether any listed running container can be read without dockerd
+
+        A mounted cgroup hierarchy is not enough: inside a container it is
+        usually the container's own namespace, without the docker cgroups
+        of its siblings, and network counters need the host's /proc to see
+        the container's process.
+        """
+        if self.version is None:
+            return False
+        root = CGROUP_ROOT if self.version == 2 else f"{CGROUP_ROOT}/memory"
+        for container in containers:
+            try:
+                pid = container.attrs["State"]["Pid"]
+            except KeyError:
+                continue
+            if self._find(root, container.id) and os.access(
+                f"{PROC_ROOT}/{pid}/net/dev", os.R_OK
+            ):
+                return True
+        return False
+
+    def read(self, container) -> Optional[Dict]:
+        """Return a stats sample for a running container, or None"""
+        if self.version is None or container.status != "running":
+            return None
+
+        try:
+            if self.version == 2:
+                counters = self._read_v2(container.id)
+            else:
+                counters = self._read_v1(container.id)
+            if counters is None:
+                return None
+            usage, memory_usage, memory_limit, io_read, io_write = counters
+            system = self._system_cpu_ns()
+            networks = self._networks(container.attrs["State"]["Pid"])
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+
+        previous_usage, previous_system = self._previous.get(
+            container.id, (usage, system)
+        )
+        self._previous[container.id] = (usage, system)
+
+        return {
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": usage},
+                "system_cpu_usage": system,
+                "online_cpus": self._online_cpus,
+            },
+            "precpu_stats": {
+                "cpu_usage": {"total_usage": previous_usage},
+                "system_cpu_usage": previous_system,
+            },
+            "memory_stats": {
+                "usage": memory_usage,
+                "limit": min(memory_limit, self._host_memory),
+            },
+            "networks": networks,
+            "blkio_stats": {
+                "io_service_bytes_recursive": [
+                    {"op": "Read", "value": io_read},
+                    {"op": "Write", "value": io_write},
+                ]
+            },
+        }
+
+    def prune(self, container_ids):
+        """Forget previous CPU readings of containers no longer listed"""
+        for container_id in self._previous.keys() - set(container_ids):
+            del self._previous[container_id]
+
+    def _find(self, root: str, container_id: str) -> Optional[str]:
+        for layout in self._LAYOUTS:
+            path = f"{root}/{layout.format(id=container_id)}"
+            if os.path.isdir(path):
+                return path
+        return None
+
+    def _read_v2(self, container_id: str) -> Optional[Tuple]:
+        base = self._find(CGROUP_ROOT, container_id)
+        if base is None:
+            return None
+
+        usage = 0
+        for line in _read_file(f"{base}/cpu.stat").splitlines():
+            key, value = line.split()
+            if key == b"usage_usec":
+                usage = int(value) * 1000
+                break
+
+        memory_usage = int(_read_file(f"{base}/memory.current"))
+        limit = _read_file(f"{base}/memory.max").strip()
+        memory_limit = self._host_memory if limit == b"max" else int(limit)
+
+        io_read = io_write = 0
+        try:
+            io_stat = _read_file(f"{base}/io.stat")
+        except FileNotFoundError:
+            io_stat = b""
+        for line in io_stat.splitlines():
+            for field in line.split()[1:]:
+                key, _, value = field.partition(b"=")
+                if key == b"rbytes":
+                    io_read += int(value)
+                elif key == b"wbytes":
+                    io_write += int(value)
+
+        return usage, memory_usage, memory_limit, io_read, io_write
+
+    def _read_v1(self, container_id: str) -> Optional[Tuple]:
+        cpu_base = self._find(f"{CGROUP_ROOT}/cpuacct", container_id)
+        memory_base = self._find(f"{CGROUP_ROOT}/memory", container_id)
+        if cpu_base is None or memory_base is None:
+            return None
+
+        usage = int(_read_file(f"{cpu_base}/cpuacct.usage"))
+        memory_usage = int(_read_file(f"{memory_base}/memory.usage_in_bytes"))
+        memory_limit = int(_read_file(f"{memory_base}/memory.limit_in_bytes"))
+
+        io_read = io_write = 0
+        blkio_base = self._find(f"{CGROUP_ROOT}/blkio", container_id)
+        if blkio_base is not None:
+            for line in _read_file(
+                f"{blkio_base}/blkio.throttle.io_service_bytes"
+            ).splitlines():
+                parts = line.split()
+                if len(parts) != 3:
+                    continue
+                if parts[1] == b"Read":
+                    io_read += int(parts[2])
+                elif parts[1] == b"Write":
+                    io_write += int(parts[2])
+
+        return usage, memory_usage, memory_limit, io_read, io_write
+
+    def _system_cpu_ns(self) -> int:
+        """Host CPU time in ns, computed the way dockerd does"""
+        fields = _read_file(f"{PROC_ROOT}/stat").split(b"\n", 1)[0].split()
+        return int(sum(int(value) for value in fields[1:8]) * self._ns_per_tick)
+
+    @staticmethod
+    def _networks(pid: int) -> Dict[str, Dict]:
+        """Per-interface byte counters from the container's network namespace"""
+        networks = {}
+        for line in _read_file(f"{PROC_ROOT}/{pid}/net/dev").splitlines()[2:]:
+            name, _, counters = line.partition(b":")
+            name = name.strip().decode()
+            if name == "lo":
+                continue
+            values = counters.split()
+            networks[name] = {"rx_bytes": int(values[0]), "tx_bytes": int(values[8])}
+        return networks
+
+
 class ResourceOptimizer:
     """Advanced resource monitoring and optimization system"""
 
     def __init__(self):
         self.docker_client = docker.from_env()
+        # Container id -> Container, seeded once and kept current from the
+        # docker event stream instead of listing every cycle
+        self._containers = {}
+        self._containers_lock = threading.Lock()
+        # Container id -> fields fixed for the container's lifetime
+        self._container_static = {}
+        events_since = int(time.time())
+        self._sync_containers()
+        # Read stats straight from cgroups where possible; otherwise keep
+        # streamed samples from dockerd
+        self.cgroup_stats = _CgroupStats()
+        self.stats_streamer = None
+        with self._containers_lock:
+            running = [
+                container
+                for container in self._containers.values()
+                if container.status == "running"
+            ]
+        if not self.cgroup_stats.available(running):
+            self.stats_streamer = _StatsStreamer()
+            self.stats_streamer.start()
+        threading.Thread(
+            target=self._follow_container_events,
+            args=(events_since,),
+            name="container-events",
+            daemon=True,
+        ).start()
+        self._pool = ThreadPoolExecutor(
+            max_workers=CONTAINER_STATS_WORKERS, thread_name_prefix="container-stats"
+        )
         self.influxdb_client = None
         self.setup_influxdb()
-        self.resource_history = []
-        self.optimization_actions = []
-        self.alerts_sent = set()
+        self._point_buffer = deque(maxlen=WRITE_BUFFER_MAX)
+        self._buffer_lock = threading.Lock()
+        self._flush_wakeup = threading.Event()
+        threading.Thread(
+            target=self._flush_points_loop, name="influx-flusher", daemon=True
+        ).start()
+        self._output_queue = queue.Queue(maxsize=OUTPUT_QUEUE_SIZE)
+        threading.Thread(
+            target=self._output_worker, name="cycle-output", daemon=True
+        ).start()
+        self._report_queue = queue.Queue(maxsize=REPORT_QUEUE_SIZE)
+        threading.Thread(
+            target=self._report_writer, name="report-writer", daemon=True
+        ).start()
+        self.resource_history = deque(maxlen=HISTORY_MAX)
+        self.optimization_actions = deque(maxlen=OPTIMIZATION_ACTIONS_MAX)
+        # Keep-alive session for webhook posts; retries transient failures
+        self._http = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=4,
+            headers={"Content-Type": "application/json"},
+            timeout=urllib3.Timeout(total=10),
+            retries=Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=None,
+                raise_on_status=False,
+            ),
+        )
+        # Sent alert text -> time.monotonic() it was sent, oldest first
+        self.alerts_sent = OrderedDict()
+        # Fixed for the lifetime of the host
+        self._cpu_count = psutil.cpu_count()
+        self._boot_time = psutil.boot_time()
+        # Seed the CPU counters so each cycle reads usage since the last one
+        psutil.cpu_percent(interval=None)
 
     def setup_influxdb(self):
         """Setup InfluxDB connection for metrics storage"""
@@ -131,8 +555,7 @@ class ResourceOptimizer:
         """Collect comprehensive host system metrics"""
         try:
             # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
+            cpu_percent = psutil.cpu_percent(interval=None)
             cpu_freq = psutil.cpu_freq()
             load_avg = (
                 psutil.getloadavg() if hasattr(psutil, "getloadavg") else (0, 0, 0)
@@ -156,7 +579,7 @@ class ResourceOptimizer:
             return {
                 "cpu": {
                     "percent": cpu_percent,
-                    "count": cpu_count,
+                    "count": self._cpu_count,
                     "frequency_mhz": cpu_freq.current if cpu_freq else 0,
                     "load_avg_1m": load_avg[0],
                     "load_avg_5m": load_avg[1],
@@ -190,7 +613,7 @@ class ResourceOptimizer:
                 },
                 "system": {
                     "process_count": process_count,
-                    "boot_time": psutil.boot_time(),
+                    "boot_time": self._boot_time,
                     "users": len(psutil.users()),
                 },
             }
@@ -199,100 +622,227 @@ class ResourceOptimizer:
             logger.error(f"Error collecting host metrics: {e}")
             return {}
 
+    def _sync_containers(self):
+        """Replace the container cache with a fresh listing"""
+        containers = self.docker_client.containers.list(all=True)
+        with self._containers_lock:
+            self._containers = {container.id: container for container in containers}
+            for container_id in self._container_static.keys() - self._containers.keys():
+                del self._container_static[container_id]
+
+    def _follow_container_events(self, since: int):
+        """Apply container events to the cache, re-listing after a gap"""
+        resync = False
+        while True:
+            try:
+                if resync:
+                    since = int(time.time())
+                    self._sync_containers()
+                for event in self.docker_client.events(
+                    decode=True,
+                    since=since,
+                    filters={"type": "container", "event": CONTAINER_EVENTS},
+                ):
+                    self._apply_container_event(event)
+                resync = True
+
+            except Exception as e:
+                logger.warning(f"Docker event stream interrupted: {e}")
+                resync = True
+                time.sleep(5)
+
+    def _apply_container_event(self, event: Dict):
+        """Refresh or drop one cached container after an event"""
+        # health_status events carry the new state after a colon
+        action = (event.get("Action") or event.get("status") or "").split(":")[0]
+        container_id = event.get("id")
+
+        container = None
+        if action != "destroy":
+            try:
+                container = self.docker_client.containers.get(container_id)
+            except docker.errors.NotFound:
+                pass
+        with self._containers_lock:
+            if container is None:
+                self._containers.pop(container_id, None)
+                self._container_static.pop(container_id, None)
+            else:
+                self._containers[container_id] = container
+
+        if self.stats_streamer is not None:
+            if action == "start":
+                self.stats_streamer.watch(container_id)
+            elif action in ("die", "destroy"):
+                self.stats_streamer.discard(container_id)
+
     def collect_container_metrics(self) -> Dict[str, Dict]:
         """Collect detailed metrics for all Docker containers"""
         container_metrics = {}
 
         try:
-            containers = self.docker_client.containers.list(all=True)
-
-            for container in containers:
-                try:
-                    stats = container.stats(stream=False)
-
-                    # Calculate CPU percentage
-                    cpu_percent = 0.0
-                    if "cpu_usage" in stats.get("cpu_stats", {}):
-                        cpu_delta = (
-                            stats["cpu_stats"]["cpu_usage"]["total_usage"]
-                            - stats["precpu_stats"]["cpu_usage"]["total_usage"]
+            with self._containers_lock:
+                containers = list(self._containers.values())
+            self.cgroup_stats.prune(container.id for container in containers)
+
+            # Containers without a streamed sample need a dockerd round-trip
+            # each, so fetch them concurrently under one deadline
+            futures = {
+                self._pool.submit(self._one_container_stats, container): container
+                for container in containers
+            }
+            results = {}
+            raw_usage = {}
+            try:
+                for future in as_completed(futures, timeout=CONTAINER_STATS_DEADLINE):
+                    container = futures[future]
+                    try:
+                        results[container.id], raw_usage[container.id] = future.result()
+                    except Exception as e:
+                        logger.warning(
+                            f"Error collecting metrics for container {container.name}: {e}"
                         )
-                        system_delta = (
-                            stats["cpu_stats"]["system_cpu_usage"]
-                            - stats["precpu_stats"]["system_cpu_usage"]
+                        results[container.id] = {"status": "error", "error": str(e)}
+            except FuturesTimeoutError:
+                for future, container in futures.items():
+                    if container.id not in results:
+                        future.cancel()
+                        logger.warning(
+                            f"Timed out collecting metrics for container {container.name}"
                         )
-                        if system_delta > 0:
-                            cpu_percent = (
-                                (cpu_delta / system_delta)
-                                * len(stats["cpu_stats"]["cpu_usage"]["percpu_usage"])
-                                * 100.0
-                            )
+                        results[container.id] = {"status": "timeout"}
 
-                    # Calculate memory metrics
-                    memory_stats = stats.get("memory_stats", {})
-                    memory_usage = memory_stats.get("usage", 0)
-                    memory_limit = memory_stats.get("limit", 0)
-                    memory_percent = (
-                        (memory_usage / memory_limit * 100) if memory_limit > 0 else 0
-                    )
-
-                    # Network I/O
-                    network_stats = stats.get("networks", {})
-                    network_rx = sum(
-                        net.get("rx_bytes", 0) for net in network_stats.values()
-                    )
-                    network_tx = sum(
-                        net.get("tx_bytes", 0) for net in network_stats.values()
-                    )
-
-                    # Block I/O
-                    blkio_stats = stats.get("blkio_stats", {})
-                    blkio_read = sum(
-                        item.get("value", 0)
-                        for item in blkio_stats.get("io_service_bytes_recursive", [])
-                        if item.get("op") == "Read"
-                    )
-                    blkio_write = sum(
-                        item.get("value", 0)
-                        for item in blkio_stats.get("io_service_bytes_recursive", [])
-                        if item.get("op") == "Write"
-                    )
-
-                    container_metrics[container.name] = {
-                        "id": container.id[:12],
-                        "status": container.status,
-                        "image": (
-                            container.image.tags[0]
-                            if container.image.tags
-                            else "unknown"
-                        ),
-                        "created": container.attrs["Created"],
-                        "cpu_percent": round(cpu_percent, 2),
-                        "memory_usage_bytes": memory_usage,
-                        "memory_limit_bytes": memory_limit,
-                        "memory_percent": round(memory_percent, 2),
-                        "network_rx_bytes": network_rx,
-                        "network_tx_bytes": network_tx,
-                        "block_read_bytes": blkio_read,
-                        "block_write_bytes": blkio_write,
-                        "restart_count": container.attrs["RestartCount"],
-                        "health_status": self.get_container_health(container),
-                    }
+            self._fill_usage_percentages(
+                [results[cid] for cid in raw_usage], list(raw_usage.values())
+            )
 
-                except Exception as e:
-                    logger.warning(
-                        f"Error collecting metrics for container {container.name}: {e}"
-                    )
-                    container_metrics[container.name] = {
-                        "status": "error",
-                        "error": str(e),
-                    }
+            for container in containers:
+                container_metrics[container.name] = results[container.id]
 
         except Exception as e:
             logger.error(f"Error collecting container metrics: {e}")
 
         return container_metrics
 
+    def _one_container_stats(self, container) -> Tuple[Dict, Tuple]:
+        """Build the metrics entry for a single container
+
+        Returns the entry and the raw (cpu_delta, system_delta, online_cpus,
+        memory_usage, memory_limit) counters its percentages are computed
+        from, in bulk, by _fill_usage_percentages.
+        """
+        # cgroup files or a streamed sample when available, one-shot API
+        # call otherwise
+        stats = self.cgroup_stats.read(container)
+        if stats is None and self.stats_streamer is not None:
+            stats = self.stats_streamer.latest(container.id)
+        if stats is None:
+            stats = container.stats(stream=False)
+
+        # CPU counters
+        cpu_delta = system_delta = online_cpus = 0
+        if "cpu_usage" in stats.get("cpu_stats", {}):
+            cpu_delta = (
+                stats["cpu_stats"]["cpu_usage"]["total_usage"]
+                - stats["precpu_stats"]["cpu_usage"]["total_usage"]
+            )
+            system_delta = (
+                stats["cpu_stats"]["system_cpu_usage"]
+                - stats["precpu_stats"]["system_cpu_usage"]
+            )
+            online_cpus = stats["cpu_stats"].get("online_cpus") or len(
+                stats["cpu_stats"]["cpu_usage"].get("percpu_usage", ())
+            )
+
+        # Memory counters
+        memory_stats = stats.get("memory_stats", {})
+        memory_usage = memory_stats.get("usage", 0)
+        memory_limit = memory_stats.get("limit", 0)
+
+        # Network I/O
+        network_stats = stats.get("networks", {})
+        network_rx = sum(net.get("rx_bytes", 0) for net in network_stats.values())
+        network_tx = sum(net.get("tx_bytes", 0) for net in network_stats.values())
+
+        # Block I/O
+        blkio_stats = stats.get("blkio_stats", {})
+        blkio_read = sum(
+            item.get("value", 0)
+            for item in blkio_stats.get("io_service_bytes_recursive", [])
+            if item.get("op") == "Read"
+        )
+        blkio_write = sum(
+            item.get("value", 0)
+            for item in blkio_stats.get("io_service_bytes_recursive", [])
+            if item.get("op") == "Write"
+        )
+
+        static = self._static_fields(container)
+        entry = {
+            "id": static["id"],
+            "status": container.status,
+            "image": static["image"],
+            "created": static["created"],
+            "cpu_percent": 0.0,
+            "memory_usage_bytes": memory_usage,
+            "memory_limit_bytes": memory_limit,
+            "memory_percent": 0.0,
+            "network_rx_bytes": network_rx,
+            "network_tx_bytes": network_tx,
+            "block_read_bytes": blkio_read,
+            "block_write_bytes": blkio_write,
+            "restart_count": container.attrs["RestartCount"],
+            "health_status": self.get_container_health(container),
+        }
+        raw = (cpu_delta, system_delta, online_cpus, memory_usage, memory_limit)
+        return entry, raw
+
+    @staticmethod
+    def _fill_usage_percentages(entries: List[Dict], raw_usage: List[Tuple]):
+        """Compute CPU and memory percentages for all containers at once"""
+        if not entries:
+            return
+
+        cpu_delta, system_delta, online_cpus, memory_usage, memory_limit = np.array(
+            raw_usage, dtype=np.float64
+        ).T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cpu_percent = np.where(
+                system_delta > 0, cpu_delta / system_delta * online_cpus * 100.0, 0.0
+            )
+            memory_percent = np.where(
+                memory_limit > 0, memory_usage / memory_limit * 100.0, 0.0
+            )
+
+        for entry, cpu, memory in zip(
+            entries,
+            np.round(cpu_percent, 2).tolist(),
+            np.round(memory_percent, 2).tolist(),
+        ):
+            entry["cpu_percent"] = cpu
+            entry["memory_percent"] = memory
+
+    def _static_fields(self, container) -> Dict:
+        """Return id, image and creation time, resolved once per container
+
+        ``container.image`` costs an image inspect call, so it is only paid
+        the first time a container is seen.
+        """
+        static = self._container_static.get(container.id)
+        if static is None:
+            tags = container.image.tags
+            static = {
+                "id": container.id[:12],
+                "image": tags[0] if tags else "unknown",
+                "created": container.attrs["Created"],
+            }
+            # Stats workers insert while the event thread prunes; skip
+            # containers dropped meanwhile so their entry is not left behind
+            with self._containers_lock:
+                if container.id in self._containers:
+                    self._container_static[container.id] = static
+        return static
+
     def get_container_health(self, container) -> str:
         """Get container health status"""
         try:
@@ -310,9 +860,7 @@ class ResourceOptimizer:
 
         # Analyze host resources
         if host_metrics:
-            cpu_percent = host_metrics.get("cpu", {}).get("percent", 0)
-            memory_percent = host_metrics.get("memory", {}).get("percent", 0)
-            disk_percent = host_metrics.get("disk", {}).get("percent", 0)
+            cpu_percent, memory_percent, disk_percent = _host_usage(host_metrics)
 
             # CPU analysis
             if cpu_percent >= RESOURCE_THRESHOLDS["cpu_critical"]:
@@ -356,7 +904,7 @@ class ResourceOptimizer:
         unhealthy_containers = []
 
         for name, metrics in container_metrics.items():
-            if metrics.get("status") == "error":
+            if metrics.get("status") in ("error", "timeout"):
                 continue
 
             cpu_percent = metrics.get("cpu_percent", 0)
@@ -380,7 +928,8 @@ class ResourceOptimizer:
         # Generate container-specific recommendations
         if high_cpu_containers:
             issues.append(
-                f"High CPU containers: {', '.join([f'{name} ({cpu:.1f}%)' for name, cpu in high_cpu_containers])}"
+                "High CPU containers: "
+                + ", ".join("%s (%.1f%%)" % entry for entry in high_cpu_containers)
             )
             recommendations.append(
                 "Review and optimize high CPU containers or increase resource limits"
@@ -388,7 +937,8 @@ class ResourceOptimizer:
 
         if high_memory_containers:
             issues.append(
-                f"High memory containers: {', '.join([f'{name} ({mem:.1f}%)' for name, mem in high_memory_containers])}"
+                "High memory containers: "
+                + ", ".join("%s (%.1f%%)" % entry for entry in high_memory_containers)
             )
             recommendations.append(
                 "Consider restarting high memory containers or increasing memory limits"
@@ -407,8 +957,9 @@ class ResourceOptimizer:
         optimizations_applied = []
 
         try:
+            _, memory_percent, disk_percent = _host_usage(host_metrics)
+
             # Automatic Docker cleanup if disk space is critical
-            disk_percent = host_metrics.get("disk", {}).get("percent", 0)
             if disk_percent >= RESOURCE_THRESHOLDS["disk_critical"]:
                 logger.info(
                     "Applying automatic Docker cleanup due to critical disk usage"
@@ -451,7 +1002,6 @@ class ResourceOptimizer:
                 )
 
             # Memory optimization: restart high-memory containers if critical
-            memory_percent = host_metrics.get("memory", {}).get("percent", 0)
             if memory_percent >= RESOURCE_THRESHOLDS["memory_critical"]:
                 high_memory_containers = [
                     (name, metrics)
@@ -467,17 +1017,7 @@ class ResourceOptimizer:
                     container_name = high_memory_containers[0][0]
 
                     # Don't restart critical infrastructure services
-                    critical_services = [
-                        "influxdb",
-                        "grafana",
-                        "prometheus",
-                        "mysql",
-                        "vault",
-                    ]
-                    if not any(
-                        service in container_name.lower()
-                        for service in critical_services
-                    ):
+                    if _CRITICAL_SERVICE_RE.search(container_name) is None:
                         try:
                             container = self.docker_client.containers.get(
                                 container_name
@@ -516,10 +1056,12 @@ class ResourceOptimizer:
                 return
 
             # Only send alerts for new issues or critical issues
+            now = time.monotonic()
+            self._expire_sent_alerts(now)
             critical_issues = [issue for issue in issues if "CRITICAL" in issue]
             new_issues = [issue for issue in issues if issue not in self.alerts_sent]
 
-            alerts_to_send = list(set(critical_issues + new_issues))
+            alerts_to_send = list(dict.fromkeys(critical_issues + new_issues))
 
             if not alerts_to_send:
                 return
@@ -535,9 +1077,7 @@ class ResourceOptimizer:
 
             # Add system overview
             if host_metrics:
-                cpu_percent = host_metrics.get("cpu", {}).get("percent", 0)
-                memory_percent = host_metrics.get("memory", {}).get("percent", 0)
-                disk_percent = host_metrics.get("disk", {}).get("percent", 0)
+                cpu_percent, memory_percent, disk_percent = _host_usage(host_metrics)
 
                 attachment_fields.append(
                     {
@@ -575,16 +1115,29 @@ class ResourceOptimizer:
                 ],
             }
 
-            response = requests.post(webhook_url, json=payload, timeout=10)
-            if response.status_code == 200:
+            body = _json_dumps(payload)
+            response = self._http.request("POST", webhook_url, body=body)
+            if response.status == 200:
                 logger.info(f"Sent resource alert with {len(alerts_to_send)} issues")
-                self.alerts_sent.update(alerts_to_send)
+                for issue in alerts_to_send:
+                    self.alerts_sent[issue] = now
+                    self.alerts_sent.move_to_end(issue)
+                self._expire_sent_alerts(now)
             else:
-                logger.error(f"Failed to send alert: {response.status_code}")
+                logger.error(f"Failed to send alert: {response.status}")
 
         except Exception as e:
             logger.error(f"Error sending alerts: {e}")
 
+    def _expire_sent_alerts(self, now: float):
+        """Forget alerts older than ALERT_REPEAT_AFTER or beyond the cap"""
+        sent = self.alerts_sent
+        while sent and (
+            len(sent) > ALERT_MEMORY_MAX
+            or next(iter(sent.values())) <= now - ALERT_REPEAT_AFTER
+        ):
+            sent.popitem(last=False)
+
     def store_metrics(self, metrics: ResourceMetrics):
         """Store metrics in InfluxDB"""
         if not self.influxdb_client:
@@ -612,7 +1165,7 @@ class ResourceOptimizer:
 
             # Container metrics points
             for container_name, container_data in metrics.containers.items():
-                if container_data.get("status") == "error":
+                if container_data.get("status") in ("error", "timeout"):
                     continue
 
                 container_point = {
@@ -649,11 +1202,50 @@ class ResourceOptimizer:
                 }
                 points.append(container_point)
 
-            self.influxdb_client.write_points(points)
+            # Buffered; the flusher thread writes them in large batches
+            with self._buffer_lock:
+                self._point_buffer.extend(points)
+                if len(self._point_buffer) >= WRITE_BATCH_SIZE:
+                    self._flush_wakeup.set()
+
+        except Exception as e:
+            logger.error(f"Error storing metrics in InfluxDB: {e}")
+
+    def _flush_points_loop(self):
+        """Write buffered points every WRITE_FLUSH_INTERVAL or when full"""
+        while True:
+            self._flush_wakeup.wait(WRITE_FLUSH_INTERVAL)
+            self._flush_wakeup.clear()
+            self.flush_points()
+
+    def flush_points(self):
+        """Write all buffered points to InfluxDB in one request per batch"""
+        with self._buffer_lock:
+            if not self._point_buffer:
+                return
+            points = list(self._point_buffer)
+            self._point_buffer.clear()
+
+        try:
+            self.influxdb_client.write_points(
+                points, time_precision="s", batch_size=WRITE_BATCH_SIZE
+            )
             logger.debug(f"Stored {len(points)} resource metric points in InfluxDB")
 
         except Exception as e:
+            if not _is_transient_write_error(e):
+                logger.error(
+                    f"Dropped {len(points)} resource metric points rejected by InfluxDB: {e}"
+                )
+                return
             logger.error(f"Error storing metrics in InfluxDB: {e}")
+            # Put them back ahead of newer points; the bounded buffer drops
+            # the oldest ones if InfluxDB stays unavailable
+            with self._buffer_lock:
+                newer = list(self._point_buffer)
+                self._point_buffer.clear()
+                self._point_buffer.extend(points)
+                self._point_buffer.extend(newer)
 
     def generate_resource_report(
         self,
@@ -663,38 +1255,39 @@ class ResourceOptimizer:
         optimizations: List[str],
     ) -> str:
         """Generate comprehensive resource report"""
-
-        report = f"""# Resource Monitoring Report
-**Timestamp**: {metrics.timestamp.isoformat()}
-
-## System Overview
-- **CPU Usage**: {metrics.host_cpu_percent:.1f}%
-- **Memory Usage**: {metrics.host_memory_percent:.1f}%
-- **Disk Usage**: {metrics.host_disk_percent:.1f}%
-- **Network I/O**: {metrics.host_network_bytes_sent:,} sent, {metrics.host_network_bytes_recv:,} received
-- **Active Containers**: {len([c for c in metrics.containers.values() if c.get('status') == 'running'])}
-- **Total Containers**: {len(metrics.containers)}
-
-## Resource Issues
-"""
+        active_containers = sum(
+            1 for c in metrics.containers.values() if c.get("status") == "running"
+        )
+        lines = [
+            "# Resource Monitoring Report",
+            f"**Timestamp**: {metrics.timestamp.isoformat()}",
+            "",
+            "## System Overview",
+            f"- **CPU Usage**: {metrics.host_cpu_percent:.1f}%",
+            f"- **Memory Usage**: {metrics.host_memory_percent:.1f}%",
+            f"- **Disk Usage**: {metrics.host_disk_percent:.1f}%",
+            f"- **Network I/O**: {metrics.host_network_bytes_sent:,} sent, "
+            f"{metrics.host_network_bytes_recv:,} received",
+            f"- **Active Containers**: {active_containers}",
+            f"- **Total Containers**: {len(metrics.containers)}",
+            "",
+            "## Resource Issues",
+        ]
 
         if issues:
-            for issue in issues:
-                report += f"- {issue}\n"
+            lines.extend(f"- {issue}" for issue in issues)
         else:
-            report += "- No issues detected ✅\n"
+            lines.append("- No issues detected ✅")
 
-        report += "\n## Recommendations\n"
+        lines.extend(("", "## Recommendations"))
         if recommendations:
-            for rec in recommendations:
-                report += f"- {rec}\n"
+            lines.extend(f"- {rec}" for rec in recommendations)
         else:
-            report += "- System operating optimally ✅\n"
+            lines.append("- System operating optimally ✅")
 
         if optimizations:
-            report += "\n## Optimizations Applied\n"
-            for opt in optimizations:
-                report += f"- {opt}\n"
+            lines.extend(("", "## Optimizations Applied"))
+            lines.extend(f"- {opt}" for opt in optimizations)
 
         # Top containers by resource usage
         if metrics.containers:
@@ -706,29 +1299,34 @@ class ResourceOptimizer:
 
             if running_containers:
                 # Top CPU consumers
-                top_cpu = sorted(
+                top_cpu = heapq.nlargest(
+                    5,
                     running_containers.items(),
                     key=lambda x: x[1].get("cpu_percent", 0),
-                    reverse=True,
-                )[:5]
+                )
 
-                report += "\n## Top CPU Consumers\n"
-                for name, data in top_cpu:
-                    report += f"- **{name}**: {data.get('cpu_percent', 0):.1f}% CPU\n"
+                lines.extend(("", "## Top CPU Consumers"))
+                lines.extend(
+                    f"- **{name}**: {data.get('cpu_percent', 0):.1f}% CPU"
+                    for name, data in top_cpu
+                )
 
                 # Top Memory consumers
-                top_memory = sorted(
+                top_memory = heapq.nlargest(
+                    5,
                     running_containers.items(),
                     key=lambda x: x[1].get("memory_percent", 0),
-                    reverse=True,
-                )[:5]
+                )
 
-                report += "\n## Top Memory Consumers\n"
+                lines.extend(("", "## Top Memory Consumers"))
                 for name, data in top_memory:
                     memory_mb = data.get("memory_usage_bytes", 0) / (1024 * 1024)
-                    report += f"- **{name}**: {data.get('memory_percent', 0):.1f}% ({memory_mb:.1f} MB)\n"
+                    lines.append(
+                        f"- **{name}**: {data.get('memory_percent', 0):.1f}% ({memory_mb:.1f} MB)"
+                    )
 
-        return report
+        lines.append("")
+        return "\n".join(lines)
 
     def run_monitoring_cycle(self):
         """Run a complete monitoring and optimization cycle"""
@@ -743,30 +1341,26 @@ class ResourceOptimizer:
                 logger.warning("Failed to collect host metrics")
                 return
 
-            # Create metrics object
-            metrics = ResourceMetrics(
-                timestamp=datetime.utcnow(),
-                host_cpu_percent=host_metrics.get("cpu", {}).get("percent", 0),
-                host_memory_percent=host_metrics.get("memory", {}).get("percent", 0),
-                host_disk_percent=host_metrics.get("disk", {}).get("percent", 0),
-                host_network_bytes_sent=host_metrics.get("network", {}).get(
-                    "bytes_sent", 0
-                ),
-                host_network_bytes_recv=host_metrics.get("network", {}).get(
-                    "bytes_recv", 0
-                ),
-                containers=container_metrics,
-                recommendations=[],
-            )
+            timestamp = datetime.utcnow()
 
             # Analyze resources
             issues, recommendations = self.analyze_resource_usage(
                 host_metrics, container_metrics
             )
-            metrics.recommendations = recommendations
 
-            # Store metrics
-            self.store_metrics(metrics)
+            # Create metrics object
+            cpu_percent, memory_percent, disk_percent = _host_usage(host_metrics)
+            network = host_metrics.get("network") or {}
+            metrics = ResourceMetrics(
+                timestamp=timestamp,
+                host_cpu_percent=cpu_percent,
+                host_memory_percent=memory_percent,
+                host_disk_percent=disk_percent,
+                host_network_bytes_sent=network.get("bytes_sent", 0),
+                host_network_bytes_recv=network.get("bytes_recv", 0),
+                containers=container_metrics,
+                recommendations=recommendations,
+            )
 
             # Apply optimizations if needed
             optimizations = []
@@ -775,26 +1369,21 @@ class ResourceOptimizer:
                     recommendations, host_metrics, container_metrics
                 )
 
-            # Send alerts for critical issues
-            self.send_alerts(issues, recommendations, host_metrics)
-
-            # Generate and save report
-            report = self.generate_resource_report(
-                metrics, issues, recommendations, optimizations
-            )
-
-            # Save report to file
-            report_dir = Path("/app/reports")
-            report_dir.mkdir(exist_ok=True)
-            report_file = report_dir / f"resource_report_{int(time.time())}.md"
-            report_file.write_text(report)
+            # Storage, alerting and reporting run on the output worker so
+            # the next collection is not delayed by them
+            try:
+                self._output_queue.put_nowait(
+                    (metrics, issues, recommendations, optimizations, host_metrics)
+                )
+            except queue.Full:
+                logger.warning("Output worker is behind, dropping cycle output")
 
             # Keep resource history (last 24 hours)
-            self.resource_history.append(metrics)
-            cutoff_time = datetime.utcnow() - timedelta(hours=24)
-            self.resource_history = [
-                m for m in self.resource_history if m.timestamp > cutoff_time
-            ]
+            history = self.resource_history
+            history.append(metrics)
+            cutoff_time = datetime.utcnow() - HISTORY_WINDOW
+            while history and history[0].timestamp <= cutoff_time:
+                history.popleft()
 
             logger.info(
                 f"Monitoring cycle complete: {len(issues)} issues, {len(recommendations)} recommendations, {len(optimizations)} optimizations"
@@ -803,21 +1392,76 @@ class ResourceOptimizer:
         except Exception as e:
             logger.error(f"Error in monitoring cycle: {e}")
 
-    def run_continuous_monitoring(self):
-        """Run continuous resource monitoring"""
-        logger.info("Starting continuous resource monitoring")
-
+    def _output_worker(self):
+        """Store metrics, send alerts and queue reports for finished cycles"""
+        cycle = 0
         while True:
+            metrics, issues, recommendations, optimizations, host_metrics = (
+                self._output_queue.get()
+            )
             try:
-                self.run_monitoring_cycle()
-                time.sleep(MONITORING_INTERVAL)
+                self.store_metrics(metrics)
 
-            except KeyboardInterrupt:
-                logger.info("Stopping resource monitoring")
-                break
+                # Send alerts for critical issues
+                self.send_alerts(issues, recommendations, host_metrics)
+
+                # Generate a report every REPORT_EVERY_N_CYCLES cycles
+                if cycle % REPORT_EVERY_N_CYCLES == 0:
+                    report = self.generate_resource_report(
+                        metrics, issues, recommendations, optimizations
+                    )
+                    report_file = REPORT_DIR / f"resource_report_{int(time.time())}.md"
+                    self._report_queue.put_nowait((report_file, report.encode("utf-8")))
+
+            except queue.Full:
+                logger.warning("Report writer is behind, dropping report")
+            except Exception as e:
+                logger.error(f"Error handling cycle output: {e}")
+            cycle += 1
+
+    def _report_writer(self):
+        """Write queued reports so disk latency never delays alerts"""
+        while True:
+            report_file, data = self._report_queue.get()
+            try:
+                report_file.parent.mkdir(exist_ok=True)
+                report_file.write_bytes(data)
             except Exception as e:
-                logger.error(f"Error in continuous monitoring: {e}")
-                time.sleep(60)
+                logger.error(f"Error writing report {report_file}: {e}")
+
+    def run_continuous_monitoring(self):
+        """Run continuous resource monitoring"""
+        logger.info("Starting continuous resource monitoring")
+
+        # Cycles start on fixed monotonic deadlines so the time spent in a
+        # cycle does not push the next one back
+        next_cycle = time.monotonic()
+        try:
+            while True:
+                try:
+                    self.run_monitoring_cycle()
+
+                    next_cycle += MONITORING_INTERVAL
+                    now = time.monotonic()
+                    if next_cycle < now:
+                        # Overran one or more intervals; skip them instead of
+                        # running back-to-back cycles to catch up
+                        missed = int((now - next_cycle) // MONITORING_INTERVAL) + 1
+                        logger.warning(f"Monitoring cycle overran {missed} interval(s)")
+                        next_cycle += missed * MONITORING_INTERVAL
+                    time.sleep(next_cycle - now)
+
+                except KeyboardInterrupt:
+                    logger.info("Stopping resource monitoring")
+                    break
+                except Exception as e:
+                    logger.error(f"Error in continuous monitoring: {e}")
+                    time.sleep(60)
+                    next_cycle = time.monotonic()
+        finally:
+            # Points buffered since the flusher's last write would be lost
+            if self.influxdb_client:
+                self.flush_points()
 
 
 if __name__ == "__main__":
@@ -5,20 +5,28 @@ Provides intelligent maintenance scheduling, automated recovery, and system heal
 """
 
 import docker
+import heapq
+import itertools
+import os
 import subprocess
+import tarfile
 import json
 import time
 import logging
 import threading
-import schedule
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Set
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Set, Union
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
 from dataclasses import dataclass, field
 from enum import Enum
+import numpy as np
 import psutil
 import shutil
+from cryptography import x509
 
 # Import secrets helper
 try:
@@ -32,8 +40,6 @@ try:
     )
 except ImportError:
     # Fallback for development
-    import os
-
     def read_secret(name, fallback=None, required=True):
         return os.environ.get(fallback, fallback)
 
@@ -45,15 +51,37 @@ except ImportError:
 
 
 # Configuration
-HEALTH_CHECK_INTERVAL = 60  # seconds
+HEALTH_CHECK_INTERVAL = 600  # seconds between full scans; changes arrive as events
+# Docker events that trigger a re-check of the affected container
+CONTAINER_EVENTS = ["die", "start", "restart", "health_status"]
+HEALTH_CHECK_WORKERS = 8  # concurrent inspect/stats calls against dockerd
+RECOVERY_POLL_INTERVAL = 0.2  # seconds between status checks after a start
+REGISTRY_CHECK_WORKERS = 4  # concurrent manifest lookups in security checks
+# Seconds a healthy container's stats snapshot may serve event-driven
+# re-checks when its cgroup cannot be read; never reused across full scans
+HEALTHY_STATS_INTERVAL = HEALTH_CHECK_INTERVAL
+# Host cgroup hierarchy, mounted read-only into the container
+CGROUP_ROOT = os.getenv("CGROUP_ROOT", "/host/sys/fs/cgroup")
 MAINTENANCE_SCHEDULE_HOURS = [2, 14]  # 2 AM and 2 PM for maintenance windows
 SELF_HEALING_MAX_ATTEMPTS = 3
 BACKUP_RETENTION_DAYS = 7
+MAINTENANCE_HISTORY_SIZE = 1000  # task records kept in memory; InfluxDB has all
+DOCKER_DATA_DIR = "/var/lib/docker"
+DOCKER_CLEANUP_FREE_RATIO = 0.30  # skip pruning while more than this is free
 LOG_RETENTION_DAYS = 30
 
+WEBHOOK_CACHE_TTL = 300  # seconds before the Slack webhook is looked up again
+NOTIFICATION_DIGEST_WINDOW = 30  # seconds repeats of a title roll into one digest
+NOTIFICATION_BURST = 5  # notifications sent right away before rate limiting
+NOTIFICATION_RATE = 0.2  # notifications per second added back to the burst
+
 INFLUXDB_HOST = "influxdb"
 INFLUXDB_PORT = 8086
 INFLUXDB_DATABASE = "maintenance_automation"
+INFLUX_FLUSH_POINTS = 500  # flush once this many points are buffered
+INFLUX_FLUSH_INTERVAL = 60  # or once this many seconds passed since the last flush
+INFLUX_WRITE_BATCH = 5000  # points per InfluxDB request
+INFLUX_BUFFER_MAX = 20000  # oldest points are dropped beyond this
 
 # Setup logging
 logging.basicConfig(
@@ -69,6 +97,48 @@ class HealthStatus(Enum):
     UNKNOWN = "unknown"
 
 
+# Severity order used by the vectorized threshold checks
+_SEVERITY = (HealthStatus.HEALTHY, HealthStatus.WARNING, HealthStatus.CRITICAL)
+_SEVERITY_CODE = {status: code for code, status in enumerate(_SEVERITY)}
+
+# Issue bits kept in ServiceHealth.issue_flags; _classify returns the
+# resource ones
+ISSUE_CRITICAL_MEMORY = 1
+ISSUE_HIGH_MEMORY = 2
+ISSUE_FREQUENT_RESTARTS = 4
+ISSUE_NOT_RUNNING = 8
+ISSUE_HEALTH_FAILED = 16
+ISSUE_RESTARTING = 32
+ISSUE_MEMORY = ISSUE_CRITICAL_MEMORY | ISSUE_HIGH_MEMORY
+
+
+def _classify(
+    mem_usage: np.ndarray, mem_limit: np.ndarray, restart_count: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Apply memory and restart thresholds to parallel per-container arrays
+
+    Returns the memory percentage, a severity code (index into _SEVERITY)
+    and an ISSUE_* bitmask for every container.
+    """
+    mem_pct = np.divide(
+        mem_usage * 100.0,
+        mem_limit,
+        out=np.zeros(mem_usage.shape, dtype=np.float64),
+        where=mem_limit > 0,
+    )
+    critical = mem_pct > 95
+    high = (mem_pct > 85) & ~critical
+    restarting = restart_count > 5
+
+    code = np.where(critical, 2, (high | restarting).astype(np.int64))
+    issues = (
+        critical * ISSUE_CRITICAL_MEMORY
+        | high * ISSUE_HIGH_MEMORY
+        | restarting * ISSUE_FREQUENT_RESTARTS
+    )
+    return mem_pct, code, issues
+
+
 class MaintenanceType(Enum):
     ROUTINE = "routine"
     EMERGENCY = "emergency"
@@ -76,21 +146,109 @@ class MaintenanceType(Enum):
     RECOVERY = "recovery"
 
 
-@dataclass
+# InfluxDB line protocol escapes, built once
+_LINE_MEASUREMENT_ESCAPES = str.maketrans({",": r"\,", " ": r"\ "})
+_LINE_KEY_ESCAPES = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ "})
+_LINE_STRING_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"'})
+
+
+def _line_field_value(value) -> str:
+    """Format a field value for InfluxDB line protocol"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, float):
+        return repr(value)
+    return f'"{str(value).translate(_LINE_STRING_ESCAPES)}"'
+
+
+def _to_line(point: Dict) -> str:
+    """Format a point dict as an InfluxDB line with a seconds timestamp
+
+    Point times are naive UTC datetimes, as from datetime.utcnow().
+    """
+    tags = "".join(
+        f",{key.translate(_LINE_KEY_ESCAPES)}={str(value).translate(_LINE_KEY_ESCAPES)}"
+        for key, value in sorted(point.get("tags", {}).items())
+        if value is not None and value != ""
+    )
+    fields = ",".join(
+        f"{key.translate(_LINE_KEY_ESCAPES)}={_line_field_value(value)}"
+        for key, value in point["fields"].items()
+        if value is not None
+    )
+    timestamp = int(point["time"].replace(tzinfo=timezone.utc).timestamp())
+    return f"{point['measurement'].translate(_LINE_MEASUREMENT_ESCAPES)}{tags} {fields} {timestamp}"
+
+
+# Memory (usage, limit) files and cgroup directory layouts per cgroup version
+_CGROUP_MEMORY_FILES = (
+    ("", "memory.current", "memory.max"),
+    ("memory/", "memory.usage_in_bytes", "memory.limit_in_bytes"),
+)
+_CGROUP_LAYOUTS = ("system.slice/docker-{id}.scope", "docker/{id}")
+_HOST_MEMORY = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def _cgroup_memory(container_id: str) -> Optional[Tuple[int, int]]:
+    """Memory usage and limit of a container read from its cgroup
+
+    Returns None when the cgroup is not visible, so callers fall back to the
+    Docker stats API. Unlimited containers report the host memory, as the
+    stats API does.
+    """
+    for prefix, usage_file, limit_file in _CGROUP_MEMORY_FILES:
+        for layout in _CGROUP_LAYOUTS:
+            base = f"{CGROUP_ROOT}/{prefix}{layout.format(id=container_id)}"
+            try:
+                with open(f"{base}/{usage_file}", "rb") as f:
+                    usage = int(f.read())
+                with open(f"{base}/{limit_file}", "rb") as f:
+                    limit = f.read().strip()
+            except (OSError, ValueError):
+                continue
+            limit = _HOST_MEMORY if limit == b"max" else int(limit)
+            return usage, min(limit, _HOST_MEMORY)
+    return None
+
+
+def _is_transient_write_error(error: Exception) -> bool:
+    """Whether a failed InfluxDB write may succeed when retried
+
+    Connection errors, timeouts and 5xx responses can clear up; a 4xx such
+    as a field type conflict or a malformed line fails on every retry.
+    """
+    from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
+
+    if isinstance(error, InfluxDBClientError):
+        return error.code is not None and error.code >= 500
+    return isinstance(
+        error,
+        (
+            InfluxDBServerError,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ),
+    )
+
+
+@dataclass(slots=True)
 class ServiceHealth:
     """Service health status data"""
 
     name: str
     status: HealthStatus
-    last_check: datetime
+    last_check_ts: float  # time.monotonic() of the last health check
     issues: List[str] = field(default_factory=list)
+    issue_flags: int = 0  # ISSUE_* bits for the entries in issues
     recovery_attempts: int = 0
     last_recovery: Optional[datetime] = None
     uptime_seconds: int = 0
     restart_count: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class MaintenanceTask:
     """Maintenance task definition"""
 
@@ -104,17 +262,83 @@ class MaintenanceTask:
     backup_required: bool = False
 
 
+@dataclass(slots=True)
+class WindowJob:
+    """Daily maintenance window transition at a fixed local time"""
+
+    hour: int
+    minute: int
+    handler: Callable[[], None]
+    next_run: Optional[datetime] = None
+
+    def reschedule(self, now: datetime):
+        """Set next_run to the first occurrence after now"""
+        next_run = now.replace(
+            hour=self.hour, minute=self.minute, second=0, microsecond=0
+        )
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        self.next_run = next_run
+
+
+class TokenBucket:
+    """Allows burst events at once, refilled at rate per second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        """Use up a token if one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
 class MaintenanceOrchestrator:
     """Advanced maintenance orchestration and self-healing system"""
 
     def __init__(self):
         self.docker_client = docker.from_env()
+        # Low-level client sharing the same connection pool, for bulk calls
+        self.api = self.docker_client.api
+        self._pool = ThreadPoolExecutor(
+            max_workers=HEALTH_CHECK_WORKERS, thread_name_prefix="health-check"
+        )
+        # Container id -> (time.monotonic(), stats) of its last snapshot
+        self._last_stats = {}
+        # Containers reported by the event stream since the last check
+        self._changed_lock = threading.Lock()
+        self._changed_containers = set()
+        self._full_scan_requested = False
+        self._container_event = threading.Event()
+        # Keep-alive session for health endpoint probes and Slack notifications
+        self.http = requests.Session()
+        self.http.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+        self.http.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self._webhook_url = None
+        self._webhook_ts = float("-inf")
+        # Title -> (message, level) repeats held for the title's digest
+        self._notif_lock = threading.Lock()
+        self._notif_window: Dict[str, List[Tuple[str, str]]] = {}
+        self._notif_bucket = TokenBucket(NOTIFICATION_RATE, NOTIFICATION_BURST)
+        # Certificate path -> (st_mtime_ns, st_size, expiry or None if unparseable)
+        self._cert_cache: Dict[str, Tuple[int, int, Optional[datetime]]] = {}
         self.influxdb_client = None
         self.setup_influxdb()
+        self._influx_buffer = deque(maxlen=INFLUX_BUFFER_MAX)
+        self._influx_last_flush = time.monotonic()
 
         # Service tracking
         self.service_health = {}
-        self.maintenance_history = []
+        self.maintenance_history = deque(maxlen=MAINTENANCE_HISTORY_SIZE)
+        self.current_window_tasks = []  # records since the window opened
         self.recovery_blacklist = set()  # Services that failed recovery multiple times
         self.maintenance_window = False
 
@@ -129,10 +353,22 @@ class MaintenanceOrchestrator:
             "zabbix-server",
         }
 
-        # Maintenance tasks queue
+        # Maintenance tasks queue: a heap of (-priority, seq, task), so the
+        # most urgent task pops first and equal priorities stay FIFO
         self.maintenance_queue = []
+        self._queue_seq = itertools.count()
+        self._task_handlers: Dict[str, Callable[[], bool]] = {
+            "docker_system_cleanup": self.docker_system_cleanup,
+            "log_rotation_cleanup": self.log_rotation_cleanup,
+            "health_check_validation": self.health_check_validation,
+            "backup_critical_configs": self.backup_critical_configs,
+            "security_updates_check": self.security_updates_check,
+            "certificate_renewal_check": self.certificate_renewal_check,
+        }
 
-        # Self-healing statistics
+        # Self-healing statistics; recoveries run concurrently, so updates
+        # go through _count_stat
+        self._stats_lock = threading.Lock()
         self.healing_stats = {
             "successful_recoveries": 0,
             "failed_recoveries": 0,
@@ -182,29 +418,54 @@ class MaintenanceOrchestrator:
 
     def schedule_maintenance_windows(self):
         """Schedule regular maintenance windows"""
+        # Fired from the main loop, which sleeps until the next job is due
+        self.window_jobs = []
         for hour in MAINTENANCE_SCHEDULE_HOURS:
-            schedule.every().day.at(f"{hour:02d}:00").do(self.enter_maintenance_window)
+            self.window_jobs.append(WindowJob(hour, 0, self.enter_maintenance_window))
             # End maintenance window after 30 minutes
             end_hour = hour
             end_minute = 30
             if end_minute >= 60:
                 end_hour += 1
                 end_minute = 0
-            schedule.every().day.at(f"{end_hour:02d}:{end_minute:02d}").do(
-                self.exit_maintenance_window
+            self.window_jobs.append(
+                WindowJob(end_hour, end_minute, self.exit_maintenance_window)
             )
 
+        now = datetime.now()
+        for job in self.window_jobs:
+            job.reschedule(now)
+
         logger.info(
             f"Scheduled maintenance windows at hours: {MAINTENANCE_SCHEDULE_HOURS}"
         )
 
+    def run_due_window_jobs(self):
+        """Run window jobs whose time has come, in time order"""
+        now = datetime.now()
+        due = sorted(
+            (job for job in self.window_jobs if job.next_run <= now),
+            key=lambda job: job.next_run,
+        )
+        for job in due:
+            job.reschedule(now)
+            job.handler()
+
+    def seconds_until_next_window_job(self) -> float:
+        """Seconds until the earliest scheduled window job"""
+        next_run = min(job.next_run for job in self.window_jobs)
+        return max(0.0, (next_run - datetime.now()).total_seconds())
+
     def enter_maintenance_window(self):
         """Enter maintenance window"""
         self.maintenance_window = True
+        self.current_window_tasks.clear()
         logger.info("🔧 Entering maintenance window")
 
         # Add routine maintenance tasks
         self.queue_routine_maintenance()
+        # Wake the main loop so the tasks start now, not at the next scan
+        self._container_event.set()
 
         # Send notification
         self.send_notification(
@@ -218,10 +479,10 @@ class MaintenanceOrchestrator:
         self.maintenance_window = False
         logger.info("✅ Exiting maintenance window")
 
+        self._flush_influx()
+
         # Send summary notification
-        completed_tasks = len(
-            [t for t in self.maintenance_history if t.get("completed_today", False)]
-        )
+        completed_tasks = sum(1 for t in self.current_window_tasks if t["success"])
         self.send_notification(
             "✅ Maintenance Window Complete",
             f"Maintenance window completed. {completed_tasks} tasks executed successfully.",
@@ -273,18 +534,50 @@ class MaintenanceOrchestrator:
         ]
 
         for task in routine_tasks:
-            self.maintenance_queue.append(task)
+            self.queue_maintenance_task(task)
             logger.info(f"Queued routine maintenance task: {task.name}")
 
-    def check_service_health(self) -> Dict[str, ServiceHealth]:
-        """Comprehensive service health assessment"""
+    def queue_maintenance_task(self, task: MaintenanceTask):
+        """Add a task to the priority queue"""
+        heapq.heappush(
+            self.maintenance_queue, (-task.priority, next(self._queue_seq), task)
+        )
+
+    def check_service_health(
+        self, container_ids: Optional[Iterable[str]] = None
+    ) -> Dict[str, ServiceHealth]:
+        """Comprehensive service health assessment
+
+        With container_ids only those containers are checked; otherwise all
+        of them, and records of removed containers are dropped.
+        """
         current_health = {}
+        # Running containers with stats, classified together after the loop
+        records, mem_usage, mem_limit, restarts = [], [], [], []
+
+        # Every container in one pass shares the same check time
+        now = time.monotonic()
 
         try:
-            containers = self.docker_client.containers.list(all=True)
+            # One list call for every container, then inspect and stats for
+            # the running ones concurrently
+            if container_ids is None:
+                containers = self.api.containers(all=True)
+            else:
+                containers = self.api.containers(
+                    all=True, filters={"id": list(container_ids)}
+                )
+            running_ids = [c["Id"] for c in containers if c["State"] == "running"]
+            if container_ids is None:
+                for container_id in self._last_stats.keys() - set(running_ids):
+                    del self._last_stats[container_id]
+            details = dict(
+                zip(running_ids, self._pool.map(self._inspect_with_stats, running_ids))
+            )
 
             for container in containers:
-                service_name = container.name
+                service_name = container["Names"][0].lstrip("/")
+                container_status = container["State"]
 
                 # Get existing health record or create new
                 if service_name in self.service_health:
@@ -293,31 +586,31 @@ class MaintenanceOrchestrator:
                     health_record = ServiceHealth(
                         name=service_name,
                         status=HealthStatus.UNKNOWN,
-                        last_check=datetime.utcnow(),
+                        last_check_ts=now,
                     )
 
                 # Update health record
-                health_record.last_check = datetime.utcnow()
-                health_record.issues = []
+                health_record.last_check_ts = now
+                health_record.issues.clear()
+                health_record.issue_flags = 0
 
                 # Basic container status
-                if container.status == "running":
+                if container_status == "running":
                     # Get container stats for health assessment
                     try:
-                        stats = container.stats(stream=False)
+                        detail = details[container["Id"]]
+                        if isinstance(detail, Exception):
+                            raise detail
+                        attrs, stats = detail
+                        # The list response carries Created as epoch seconds
                         health_record.uptime_seconds = int(
-                            time.time()
-                            - datetime.fromisoformat(
-                                container.attrs["Created"].replace("Z", "+00:00")
-                            ).timestamp()
-                        )
-                        health_record.restart_count = container.attrs.get(
-                            "RestartCount", 0
+                            time.time() - container["Created"]
                         )
+                        health_record.restart_count = attrs.get("RestartCount", 0)
 
                         # Check container health
                         health_status = (
-                            container.attrs.get("State", {})
+                            attrs.get("State", {})
                             .get("Health", {})
                             .get("Status", "unknown")
                         )
@@ -327,39 +620,21 @@ class MaintenanceOrchestrator:
                         elif health_status == "unhealthy":
                             health_record.status = HealthStatus.CRITICAL
                             health_record.issues.append("Container health check failed")
-                        elif container.attrs.get("State", {}).get("Restarting", False):
+                            health_record.issue_flags |= ISSUE_HEALTH_FAILED
+                        elif attrs.get("State", {}).get("Restarting", False):
                             health_record.status = HealthStatus.WARNING
                             health_record.issues.append("Container is restarting")
+                            health_record.issue_flags |= ISSUE_RESTARTING
                         else:
                             health_record.status = HealthStatus.HEALTHY
 
-                        # Check resource usage
-                        if "memory_stats" in stats:
-                            memory_usage = stats["memory_stats"].get("usage", 0)
-                            memory_limit = stats["memory_stats"].get("limit", 1)
-                            memory_percent = (
-                                (memory_usage / memory_limit) * 100
-                                if memory_limit > 0
-                                else 0
-                            )
-
-                            if memory_percent > 95:
-                                health_record.status = HealthStatus.CRITICAL
-                                health_record.issues.append(
-                                    f"Critical memory usage: {memory_percent:.1f}%"
-                                )
-                            elif memory_percent > 85:
-                                health_record.status = HealthStatus.WARNING
-                                health_record.issues.append(
-                                    f"High memory usage: {memory_percent:.1f}%"
-                                )
-
-                        # Check if container has been restarting frequently
-                        if health_record.restart_count > 5:
-                            health_record.status = HealthStatus.WARNING
-                            health_record.issues.append(
-                                f"Frequent restarts: {health_record.restart_count}"
-                            )
+                        # Resource thresholds are checked for all containers
+                        # at once below
+                        memory_stats = stats.get("memory_stats", {})
+                        records.append(health_record)
+                        mem_usage.append(memory_stats.get("usage", 0))
+                        mem_limit.append(memory_stats.get("limit", 1))
+                        restarts.append(health_record.restart_count)
 
                     except Exception as e:
                         health_record.status = HealthStatus.WARNING
@@ -367,21 +642,31 @@ class MaintenanceOrchestrator:
                             f"Stats collection failed: {str(e)}"
                         )
 
-                elif container.status in ["exited", "dead"]:
+                elif container_status in ["exited", "dead"]:
                     health_record.status = HealthStatus.CRITICAL
                     health_record.issues.append(
-                        f"Container not running: {container.status}"
+                        f"Container not running: {container_status}"
                     )
+                    health_record.issue_flags |= ISSUE_NOT_RUNNING
                     health_record.uptime_seconds = 0
 
                 else:
                     health_record.status = HealthStatus.WARNING
                     health_record.issues.append(
-                        f"Unknown container status: {container.status}"
+                        f"Unknown container status: {container_status}"
                     )
+                    if container_status == "restarting":
+                        health_record.issue_flags |= ISSUE_RESTARTING
 
                 current_health[service_name] = health_record
 
+            if records:
+                self._classify_resource_usage(records, mem_usage, mem_limit, restarts)
+
+            if container_ids is None:
+                for service_name in self.service_health.keys() - current_health.keys():
+                    del self.service_health[service_name]
+
         except Exception as e:
             logger.error(f"Error checking service health: {e}")
 
@@ -389,6 +674,104 @@ class MaintenanceOrchestrator:
         self.service_health.update(current_health)
         return current_health
 
+    def _classify_resource_usage(
+        self,
+        records: List[ServiceHealth],
+        mem_usage: List[int],
+        mem_limit: List[int],
+        restarts: List[int],
+    ):
+        """Apply memory and restart thresholds to running containers
+
+        Inputs are parallel to records. Status only ever escalates, and
+        issue strings are built for the flagged containers alone.
+        """
+        mem_pct, code, issues = _classify(
+            np.asarray(mem_usage, dtype=np.float64),
+            np.asarray(mem_limit, dtype=np.float64),
+            np.asarray(restarts, dtype=np.int64),
+        )
+        base_code = np.fromiter(
+            (_SEVERITY_CODE[r.status] for r in records),
+            dtype=np.int64,
+            count=len(records),
+        )
+        status = np.maximum(base_code, code)
+
+        for i in np.flatnonzero(issues):
+            record = records[i]
+            record.status = _SEVERITY[status[i]]
+            record.issue_flags |= int(issues[i])
+            if issues[i] & ISSUE_CRITICAL_MEMORY:
+                record.issues.append(f"Critical memory usage: {mem_pct[i]:.1f}%")
+            elif issues[i] & ISSUE_HIGH_MEMORY:
+                record.issues.append(f"High memory usage: {mem_pct[i]:.1f}%")
+            if issues[i] & ISSUE_FREQUENT_RESTARTS:
+                record.issues.append(f"Frequent restarts: {record.restart_count}")
+
+    def _follow_container_events(self):
+        """Queue containers named in Docker events for a re-check"""
+        since = int(time.time())
+        while True:
+            try:
+                for event in self.api.events(
+                    decode=True,
+                    since=since,
+                    filters={"type": "container", "event": CONTAINER_EVENTS},
+                ):
+                    since = event.get("time", since)
+                    with self._changed_lock:
+                        self._changed_containers.add(event["id"])
+                    self._container_event.set()
+
+            except Exception as e:
+                logger.warning(f"Docker event stream interrupted: {e}")
+                # Events may have been missed; scan everything once
+                self._full_scan_requested = True
+                self._container_event.set()
+                time.sleep(5)
+
+    def _take_changed_containers(self) -> Set[str]:
+        """Return and reset the containers queued by the event stream"""
+        with self._changed_lock:
+            changed = self._changed_containers
+            self._changed_containers = set()
+            self._container_event.clear()
+        return changed
+
+    def _inspect_with_stats(
+        self, container_id: str
+    ) -> Union[Tuple[Dict, Dict], Exception]:
+        """Fetch inspect data and a stats snapshot for one container
+
+        Errors are returned in place of the result so one failing container
+        only marks its own record.
+        """
+        try:
+            attrs = self.api.inspect_container(container_id)
+
+            # The memory check of healthy containers reads the cgroup, which
+            # is current on every scan without a stats call; failing that,
+            # event-driven re-checks reuse the last snapshot until it is
+            # HEALTHY_STATS_INTERVAL old. one_shot skips the daemon's wait
+            # for a second CPU sample
+            health = attrs.get("State", {}).get("Health", {}).get("Status")
+            now = time.monotonic()
+            if health == "healthy":
+                memory = _cgroup_memory(container_id)
+                if memory is not None:
+                    usage, limit = memory
+                    return attrs, {"memory_stats": {"usage": usage, "limit": limit}}
+                last = self._last_stats.get(container_id)
+                if last is not None and now - last[0] < HEALTHY_STATS_INTERVAL:
+                    return attrs, last[1]
+
+            stats = self.api.stats(container_id, stream=False, one_shot=True)
+            self._last_stats[container_id] = (now, stats)
+            return attrs, stats
+        except Exception as e:
+            return e
+
     def attempt_service_recovery(
         self, service_name: str, health_record: ServiceHealth
     ) -> bool:
@@ -411,35 +794,36 @@ class MaintenanceOrchestrator:
             recovery_success = False
 
             # Choose recovery strategy based on issues
-            if any("not running" in issue for issue in health_record.issues):
+            flags = health_record.issue_flags
+            if flags & ISSUE_NOT_RUNNING:
                 # Container is stopped - try to start it
                 logger.info(f"Starting stopped container: {service_name}")
                 container.start()
-                time.sleep(10)  # Wait for startup
-                recovery_success = container.status == "running"
+                recovery_success = self._wait_until_running(container, 10)
 
-            elif any("health check failed" in issue for issue in health_record.issues):
+            elif flags & ISSUE_HEALTH_FAILED:
                 # Health check failed - try restart
                 logger.info(f"Restarting unhealthy container: {service_name}")
                 container.restart()
-                time.sleep(15)  # Wait for restart
-                recovery_success = container.status == "running"
+                recovery_success = self._wait_until_running(container, 15)
 
-            elif any("memory usage" in issue for issue in health_record.issues):
+            elif flags & ISSUE_MEMORY:
                 # Memory issue - try restart to clear memory
                 logger.info(f"Restarting high-memory container: {service_name}")
                 container.restart()
-                time.sleep(20)  # Wait longer for memory-heavy services
-                recovery_success = container.status == "running"
+                # Allow longer for memory-heavy services
+                recovery_success = self._wait_until_running(container, 20)
 
-            elif any("restarting" in issue for issue in health_record.issues):
+            elif flags & ISSUE_RESTARTING:
                 # Container stuck restarting - force restart
                 logger.info(f"Force restarting stuck container: {service_name}")
                 container.kill()
-                time.sleep(5)
+                try:
+                    container.wait(timeout=5)
+                except Exception:
+                    pass  # Start anyway, as after the previous fixed pause
                 container.start()
-                time.sleep(15)
-                recovery_success = container.status == "running"
+                recovery_success = self._wait_until_running(container, 15)
 
             # Update recovery tracking
             health_record.recovery_attempts += 1
@@ -447,7 +831,7 @@ class MaintenanceOrchestrator:
 
             if recovery_success:
                 logger.info(f"✅ Successfully recovered service: {service_name}")
-                self.healing_stats["successful_recoveries"] += 1
+                self._count_stat("successful_recoveries")
                 health_record.recovery_attempts = 0  # Reset on success
 
                 # Send success notification for critical services
@@ -461,7 +845,7 @@ class MaintenanceOrchestrator:
                 return True
             else:
                 logger.error(f"❌ Failed to recover service: {service_name}")
-                self.healing_stats["failed_recoveries"] += 1
+                self._count_stat("failed_recoveries")
 
                 # Send failure notification for critical services
                 if service_name in self.critical_services:
@@ -476,41 +860,42 @@ class MaintenanceOrchestrator:
         except Exception as e:
             logger.error(f"Error during recovery of {service_name}: {e}")
             health_record.recovery_attempts += 1
-            self.healing_stats["failed_recoveries"] += 1
+            self._count_stat("failed_recoveries")
             return False
 
+    def _wait_until_running(self, container, timeout: float) -> bool:
+        """Poll a container until it reports running or timeout expires"""
+        deadline = time.monotonic() + timeout
+        while True:
+            container.reload()
+            if container.status == "running":
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(RECOVERY_POLL_INTERVAL)
+
+    def _count_stat(self, name: str):
+        """Increment a healing statistic from any thread"""
+        with self._stats_lock:
+            self.healing_stats[name] += 1
+
     def execute_maintenance_task(self, task: MaintenanceTask) -> bool:
         """Execute a specific maintenance task"""
         logger.info(f"🔧 Executing maintenance task: {task.name}")
 
         start_time = datetime.utcnow()
+        started = time.monotonic()
         success = False
 
         try:
-            if task.name == "docker_system_cleanup":
-                success = self.docker_system_cleanup()
-
-            elif task.name == "log_rotation_cleanup":
-                success = self.log_rotation_cleanup()
-
-            elif task.name == "health_check_validation":
-                success = self.health_check_validation()
-
-            elif task.name == "backup_critical_configs":
-                success = self.backup_critical_configs()
-
-            elif task.name == "security_updates_check":
-                success = self.security_updates_check()
-
-            elif task.name == "certificate_renewal_check":
-                success = self.certificate_renewal_check()
-
-            else:
+            handler = self._task_handlers.get(task.name)
+            if handler is None:
                 logger.warning(f"Unknown maintenance task: {task.name}")
                 return False
+            success = handler()
 
             # Record maintenance task execution
-            duration = (datetime.utcnow() - start_time).total_seconds()
+            duration = time.monotonic() - started
             task_record = {
                 "name": task.name,
                 "type": task.task_type.value,
@@ -521,25 +906,26 @@ class MaintenanceOrchestrator:
             }
 
             self.maintenance_history.append(task_record)
-            self.healing_stats["maintenance_tasks_completed"] += 1
+            self.current_window_tasks.append(task_record)
+            self._count_stat("maintenance_tasks_completed")
 
             # Store in InfluxDB
             if self.influxdb_client:
-                point = {
-                    "measurement": "maintenance_tasks",
-                    "tags": {
-                        "task_name": task.name,
-                        "task_type": task.task_type.value,
-                        "success": success,
-                    },
-                    "fields": {"duration_seconds": duration, "priority": task.priority},
-                    "time": start_time,
-                }
-
-                try:
-                    self.influxdb_client.write_points([point])
-                except Exception as e:
-                    logger.error(f"Failed to store maintenance task in InfluxDB: {e}")
+                self._buffer_point(
+                    {
+                        "measurement": "maintenance_tasks",
+                        "tags": {
+                            "task_name": task.name,
+                            "task_type": task.task_type.value,
+                            "success": success,
+                        },
+                        "fields": {
+                            "duration_seconds": duration,
+                            "priority": task.priority,
+                        },
+                        "time": start_time,
+                    }
+                )
 
             if success:
                 logger.info(
@@ -556,38 +942,71 @@ class MaintenanceOrchestrator:
             logger.error(f"Error executing maintenance task {task.name}: {e}")
             return False
 
+    def _buffer_point(self, point: Dict):
+        """Queue a point for InfluxDB, flushing when the buffer is due"""
+        self._influx_buffer.append(_to_line(point))
+        self._flush_influx(force=False)
+
+    def _flush_influx(self, force: bool = True):
+        """Write buffered points; unless forced, only when size or age is due"""
+        if not self._influx_buffer or self.influxdb_client is None:
+            return
+        if not force and (
+            len(self._influx_buffer) < INFLUX_FLUSH_POINTS
+            and time.monotonic() - self._influx_last_flush < INFLUX_FLUSH_INTERVAL
+        ):
+            return
+
+        points = list(self._influx_buffer)
+        self._influx_buffer.clear()
+        self._influx_last_flush = time.monotonic()
+        try:
+            self.influxdb_client.write_points(
+                points,
+                time_precision="s",
+                batch_size=INFLUX_WRITE_BATCH,
+                protocol="line",
+            )
+            logger.debug(f"Stored {len(points)} maintenance points in InfluxDB")
+        except Exception as e:
+            if not _is_transient_write_error(e):
+                logger.error(
+                    f"Dropped {len(points)} maintenance points rejected by InfluxDB: {e}"
+                )
+                return
+            logger.error(f"Failed to store maintenance points in InfluxDB: {e}")
+            # Keep them for the next flush; the bounded buffer drops the
+            # oldest if InfluxDB stays unavailable
+            self._influx_buffer.extendleft(reversed(points))
+
     def docker_system_cleanup(self) -> bool:
         """Perform Docker system cleanup"""
         try:
             logger.info("Running Docker system cleanup")
 
-            # Prune containers
-            pruned_containers = self.docker_client.containers.prune()
-            containers_removed = len(pruned_containers.get("ContainersDeleted", []))
-
-            # Prune images
-            pruned_images = self.docker_client.images.prune()
-            images_removed = len(pruned_images.get("ImagesDeleted", []))
-
-            # Prune networks
-            pruned_networks = self.docker_client.networks.prune()
-            networks_removed = len(pruned_networks.get("NetworksDeleted", []))
-
-            # Prune volumes
-            pruned_volumes = self.docker_client.volumes.prune()
-            volumes_removed = len(pruned_volumes.get("VolumesDeleted", []))
+            if self._docker_disk_free_ratio() > DOCKER_CLEANUP_FREE_RATIO:
+                logger.info("Enough free space under Docker data dir, skipping prune")
+                return True
 
-            # Calculate space reclaimed
-            space_reclaimed = (
-                pruned_containers.get("SpaceReclaimed", 0)
-                + pruned_images.get("SpaceReclaimed", 0)
-                + pruned_volumes.get("SpaceReclaimed", 0)
-            )
+            # Cheapest first; stop once enough space is free again
+            removed = {"containers": 0, "networks": 0, "images": 0, "volumes": 0}
+            space_reclaimed = 0
+            for kind, collection, deleted_key in (
+                ("containers", self.docker_client.containers, "ContainersDeleted"),
+                ("networks", self.docker_client.networks, "NetworksDeleted"),
+                ("images", self.docker_client.images, "ImagesDeleted"),
+                ("volumes", self.docker_client.volumes, "VolumesDeleted"),
+            ):
+                pruned = collection.prune()
+                removed[kind] = len(pruned.get(deleted_key) or [])
+                space_reclaimed += pruned.get("SpaceReclaimed", 0)
+                if self._docker_disk_free_ratio() > DOCKER_CLEANUP_FREE_RATIO:
+                    break
 
             logger.info(
-                f"Docker cleanup completed: {containers_removed} containers, "
-                f"{images_removed} images, {networks_removed} networks, "
-                f"{volumes_removed} volumes removed. "
+                f"Docker cleanup completed: {removed['containers']} containers, "
+                f"{removed['images']} images, {removed['networks']} networks, "
+                f"{removed['volumes']} volumes removed. "
                 f"Space reclaimed: {space_reclaimed / (1024*1024):.1f} MB"
             )
 
@@ -597,6 +1016,17 @@ class MaintenanceOrchestrator:
             logger.error(f"Docker system cleanup failed: {e}")
             return False
 
+    def _docker_disk_free_ratio(self) -> float:
+        """Free fraction of the filesystem holding Docker data
+
+        Returns 0 when the data dir is not visible, so pruning still runs.
+        """
+        try:
+            usage = shutil.disk_usage(DOCKER_DATA_DIR)
+        except OSError:
+            return 0.0
+        return usage.free / usage.total if usage.total else 0.0
+
     def log_rotation_cleanup(self) -> bool:
         """Clean up old log files"""
         try:
@@ -608,28 +1038,42 @@ class MaintenanceOrchestrator:
                 "/home/mills/collections/*/logs",
             ]
 
-            cutoff_date = datetime.utcnow() - timedelta(days=LOG_RETENTION_DAYS)
             files_removed = 0
             space_freed = 0
 
             for log_dir_pattern in log_dirs:
                 for log_dir in Path("/").glob(log_dir_pattern.lstrip("/")):
                     if log_dir.is_dir():
-                        for log_file in log_dir.rglob("*.log*"):
-                            try:
-                                if log_file.is_file():
-                                    file_mtime = datetime.fromtimestamp(
-                                        log_file.stat().st_mtime
-                                    )
-                                    if file_mtime < cutoff_date:
-                                        file_size = log_file.stat().st_size
-                                        log_file.unlink()
-                                        files_removed += 1
-                                        space_freed += file_size
-                            except Exception as e:
-                                logger.debug(
-                                    f"Could not remove log file {log_file}: {e}"
-                                )
+                        # find(1) walks, ages and deletes in one process,
+                        # printing each removed file's size for the totals;
+                        # -printf follows -delete so only files actually
+                        # removed are counted
+                        result = subprocess.run(
+                            [
+                                "find",
+                                str(log_dir),
+                                "-type",
+                                "f",
+                                "-name",
+                                "*.log*",
+                                "-mmin",
+                                f"+{LOG_RETENTION_DAYS * 24 * 60}",
+                                "-delete",
+                                "-printf",
+                                "%s\\n",
+                            ],
+                            capture_output=True,
+                            text=True,
+                            timeout=300,
+                        )
+                        sizes = result.stdout.split()
+                        files_removed += len(sizes)
+                        space_freed += sum(int(size) for size in sizes)
+                        if result.returncode != 0:
+                            logger.debug(
+                                f"Could not remove some log files in {log_dir}: "
+                                f"{result.stderr.strip()}"
+                            )
 
             logger.info(
                 f"Log cleanup completed: {files_removed} files removed, "
@@ -655,15 +1099,13 @@ class MaintenanceOrchestrator:
                 "vault": "http://vault:8200/v1/sys/health",
             }
 
-            failed_checks = []
-
-            for service, endpoint in health_endpoints.items():
-                try:
-                    response = requests.get(endpoint, timeout=10)
-                    if response.status_code not in [200, 204]:
-                        failed_checks.append(f"{service}: HTTP {response.status_code}")
-                except requests.RequestException as e:
-                    failed_checks.append(f"{service}: {str(e)}")
+            # Probe all endpoints concurrently; total time is the slowest one
+            results = self._pool.map(self._probe_endpoint, health_endpoints.values())
+            failed_checks = [
+                f"{service}: {error}"
+                for service, error in zip(health_endpoints, results)
+                if error is not None
+            ]
 
             if failed_checks:
                 logger.warning(f"Health check failures: {'; '.join(failed_checks)}")
@@ -683,16 +1125,26 @@ class MaintenanceOrchestrator:
             logger.error(f"Health check validation failed: {e}")
             return False
 
+    def _probe_endpoint(self, endpoint: str) -> Optional[str]:
+        """Return None if a health endpoint answers OK, else the failure"""
+        try:
+            response = self.http.get(endpoint, timeout=5)
+            if response.status_code not in [200, 204]:
+                return f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            return str(e)
+        return None
+
     def backup_critical_configs(self) -> bool:
         """Backup critical configuration files"""
         try:
             logger.info("Running critical config backup")
 
-            # Create backup directory
-            backup_dir = Path(
-                f"/home/mills/backups/maintenance_backup_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+            # Everything goes into one archive, written sequentially
+            backup_path = Path(
+                f"/home/mills/backups/maintenance_backup_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.tar.gz"
             )
-            backup_dir.mkdir(parents=True, exist_ok=True)
+            backup_path.parent.mkdir(parents=True, exist_ok=True)
 
             # Critical files to backup
             critical_files = [
@@ -705,26 +1157,31 @@ class MaintenanceOrchestrator:
 
             backed_up_files = 0
 
-            for file_path in critical_files:
-                source_path = Path(file_path)
-                if source_path.exists():
-                    try:
-                        if source_path.is_file():
-                            dest_path = backup_dir / source_path.name
-                            shutil.copy2(source_path, dest_path)
-                            backed_up_files += 1
-                        elif source_path.is_dir():
-                            dest_path = backup_dir / source_path.name
-                            shutil.copytree(source_path, dest_path, dirs_exist_ok=True)
+            # The archive holds .env and the secrets directory, so it is
+            # created owner-only rather than with the umask default. Fast
+            # compression level; config files are small and the archive is
+            # rewritten every maintenance window
+            fd = os.open(backup_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as backup_file, tarfile.open(
+                fileobj=backup_file, mode="w:gz", compresslevel=1
+            ) as archive:
+                for file_path in critical_files:
+                    source_path = Path(file_path)
+                    if source_path.exists():
+                        try:
+                            archive.add(source_path, arcname=source_path.name)
                             backed_up_files += 1
-                    except Exception as e:
-                        logger.warning(f"Failed to backup {source_path}: {e}")
+                        except Exception as e:
+                            logger.warning(f"Failed to backup {source_path}: {e}")
+
+            if not backed_up_files:
+                backup_path.unlink()
 
             # Clean up old backups
             self.cleanup_old_backups()
 
             logger.info(
-                f"Config backup completed: {backed_up_files} items backed up to {backup_dir}"
+                f"Config backup completed: {backed_up_files} items backed up to {backup_path}"
             )
 
             return backed_up_files > 0
@@ -736,22 +1193,30 @@ class MaintenanceOrchestrator:
     def cleanup_old_backups(self):
         """Clean up backups older than retention period"""
         try:
-            backup_base_dir = Path("/home/mills/backups")
-            if not backup_base_dir.exists():
+            backup_base_dir = "/home/mills/backups"
+            if not os.path.isdir(backup_base_dir):
                 return
 
-            cutoff_date = datetime.utcnow() - timedelta(days=BACKUP_RETENTION_DAYS)
+            cutoff_ts = time.time() - BACKUP_RETENTION_DAYS * 24 * 60 * 60
             removed_backups = 0
 
-            for backup_dir in backup_base_dir.glob("maintenance_backup_*"):
-                if backup_dir.is_dir():
-                    dir_mtime = datetime.fromtimestamp(backup_dir.stat().st_mtime)
-                    if dir_mtime < cutoff_date:
-                        shutil.rmtree(backup_dir)
-                        removed_backups += 1
+            with os.scandir(backup_base_dir) as entries:
+                expired = [
+                    entry
+                    for entry in entries
+                    if entry.name.startswith("maintenance_backup_")
+                    and entry.stat().st_mtime < cutoff_ts
+                ]
+            for entry in expired:
+                # Backups taken before archives were used are directories
+                if entry.is_dir():
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+                removed_backups += 1
 
             if removed_backups > 0:
-                logger.info(f"Cleaned up {removed_backups} old backup directories")
+                logger.info(f"Cleaned up {removed_backups} old backups")
 
         except Exception as e:
             logger.error(f"Backup cleanup failed: {e}")
@@ -761,27 +1226,29 @@ class MaintenanceOrchestrator:
         try:
             logger.info("Running security updates check")
 
-            # Check for container image updates
-            outdated_images = []
+            # Check for container image updates, once per distinct image
+            containers_by_image = {}
+            for container in self.api.containers():
+                containers_by_image.setdefault(container["ImageID"], []).append(
+                    container["Names"][0].lstrip("/")
+                )
 
-            containers = self.docker_client.containers.list()
-            for container in containers[:10]:  # Limit to avoid overwhelming API
-                try:
-                    image_name = (
-                        container.image.tags[0] if container.image.tags else "unknown"
+            with ThreadPoolExecutor(
+                max_workers=REGISTRY_CHECK_WORKERS, thread_name_prefix="registry-check"
+            ) as pool:
+                update_available = dict(
+                    zip(
+                        containers_by_image,
+                        pool.map(self._image_update_available, containers_by_image),
                     )
-                    if ":latest" in image_name:
-                        # Pull latest and check if update is available
-                        try:
-                            pulled_image = self.docker_client.images.pull(
-                                image_name.split(":")[0]
-                            )
-                            if pulled_image.id != container.image.id:
-                                outdated_images.append(container.name)
-                        except Exception:
-                            pass  # Skip if pull fails
-                except Exception:
-                    continue
+                )
+
+            outdated_images = [
+                name
+                for image_id, names in containers_by_image.items()
+                if update_available[image_id]
+                for name in names
+            ]
 
             if outdated_images:
                 logger.info(
@@ -803,6 +1270,34 @@ class MaintenanceOrchestrator:
             logger.error(f"Security updates check failed: {e}")
             return False
 
+    def _image_update_available(self, image_id: str) -> bool:
+        """Compare a local :latest image with the registry manifest digest
+
+        Only the manifest is fetched, so no layers are downloaded.
+        """
+        try:
+            image = self.api.inspect_image(image_id)
+            tags = image.get("RepoTags") or []
+            image_name = tags[0] if tags else "unknown"
+            if ":latest" not in image_name:
+                return False
+
+            repo = image_name.rsplit(":", 1)[0]
+            local_digests = {
+                digest.split("@", 1)[1]
+                for digest in image.get("RepoDigests") or []
+                if digest.startswith(repo + "@")
+            }
+            if not local_digests:
+                return False  # Built locally, nothing to compare against
+
+            remote_digest = self.api.inspect_distribution(image_name)["Descriptor"][
+                "digest"
+            ]
+            return remote_digest not in local_digests
+        except Exception:
+            return False  # Skip if the registry lookup fails
+
     def certificate_renewal_check(self) -> bool:
         """Check SSL certificate expiration"""
         try:
@@ -819,41 +1314,34 @@ class MaintenanceOrchestrator:
 
             expiring_certs = []
             warning_days = 30  # Warn if expiring within 30 days
+            seen = set()
 
             for cert_dir in swag_certs_dir.iterdir():
                 if cert_dir.is_dir():
                     cert_file = cert_dir / "cert.pem"
                     if cert_file.exists():
+                        seen.add(str(cert_file))
                         try:
-                            # Use openssl to check certificate expiration
-                            result = subprocess.run(
-                                [
-                                    "openssl",
-                                    "x509",
-                                    "-in",
-                                    str(cert_file),
-                                    "-noout",
-                                    "-enddate",
-                                ],
-                                capture_output=True,
-                                text=True,
+                            expires = self._cert_expiry(cert_file)
+                            if expires is None:
+                                continue
+                            logger.debug(
+                                f"Certificate {cert_dir.name} expires: {expires}"
                             )
-
-                            if result.returncode == 0:
-                                # Parse expiration date
-                                date_str = result.stdout.strip().replace(
-                                    "notAfter=", ""
-                                )
-                                # This is a simplified check - in production would use proper date parsing
-                                logger.debug(
-                                    f"Certificate {cert_dir.name} expires: {date_str}"
-                                )
+                            if expires - datetime.utcnow() < timedelta(
+                                days=warning_days
+                            ):
+                                expiring_certs.append(cert_dir.name)
 
                         except Exception as e:
                             logger.debug(
                                 f"Could not check certificate {cert_dir.name}: {e}"
                             )
 
+            # Forget certificates that were removed
+            for path in self._cert_cache.keys() - seen:
+                del self._cert_cache[path]
+
             if expiring_certs:
                 logger.warning(
                     f"Found {len(expiring_certs)} certificates expiring soon"
@@ -872,10 +1360,85 @@ class MaintenanceOrchestrator:
             logger.error(f"Certificate renewal check failed: {e}")
             return False
 
+    def _cert_expiry(self, cert_file: Path) -> Optional[datetime]:
+        """Expiry (naive UTC) of a PEM certificate, cached by mtime and size
+
+        Unparseable files are cached as None so they are not retried until
+        they are replaced.
+        """
+        st = cert_file.stat()
+        cached = self._cert_cache.get(str(cert_file))
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+
+        try:
+            expires = x509.load_pem_x509_certificate(
+                cert_file.read_bytes()
+            ).not_valid_after
+        except ValueError as e:
+            logger.debug(f"Could not parse certificate {cert_file}: {e}")
+            expires = None
+        self._cert_cache[str(cert_file)] = (st.st_mtime_ns, st.st_size, expires)
+        return expires
+
+    def _get_webhook_cached(self, ttl: float = WEBHOOK_CACHE_TTL) -> Optional[str]:
+        """Slack webhook URL, looked up again once ttl seconds have passed"""
+        now = time.monotonic()
+        if now - self._webhook_ts >= ttl:
+            self._webhook_url = get_slack_webhook()
+            self._webhook_ts = now
+        return self._webhook_url
+
     def send_notification(self, title: str, message: str, level: str = "info"):
-        """Send notification via Slack"""
+        """Send notification via Slack
+
+        The first notification with a title goes out right away while the
+        rate limit allows. Repeats within NOTIFICATION_DIGEST_WINDOW, and
+        rate-limited ones, are sent as one digest when the window closes.
+        """
+        with self._notif_lock:
+            pending = self._notif_window.get(title)
+            send_now = False
+            if pending is None:
+                pending = self._notif_window[title] = []
+                send_now = self._notif_bucket.take()
+                timer = threading.Timer(
+                    NOTIFICATION_DIGEST_WINDOW,
+                    self._flush_notification_digest,
+                    args=(title,),
+                )
+                timer.daemon = True
+                timer.start()
+            if not send_now:
+                pending.append((message, level))
+
+        if send_now:
+            self._post_notification(title, message, level)
+
+    def _flush_notification_digest(self, title: str):
+        """Send the notifications held for title as one message
+
+        Titles are shared by every service (e.g. "Recovery Failed"), so the
+        digest lists each distinct message rather than only the latest.
+        """
+        with self._notif_lock:
+            pending = self._notif_window.pop(title, [])
+        if not pending:
+            return
+
+        message, level = pending[-1]
+        if len(pending) > 1:
+            messages = dict.fromkeys(held for held, _ in pending)
+            message = "\n".join(f"• {held}" for held in messages) + (
+                f"\n\n({len(pending)} notifications in the last "
+                f"{NOTIFICATION_DIGEST_WINDOW}s)"
+            )
+        self._post_notification(title, message, level)
+
+    def _post_notification(self, title: str, message: str, level: str):
+        """Post one message to the Slack webhook"""
         try:
-            webhook_url = get_slack_webhook()
+            webhook_url = self._get_webhook_cached()
             if not webhook_url:
                 return
 
@@ -900,7 +1463,7 @@ class MaintenanceOrchestrator:
                 ],
             }
 
-            response = requests.post(webhook_url, json=payload, timeout=10)
+            response = self.http.post(webhook_url, json=payload, timeout=10)
             if response.status_code == 200:
                 logger.debug(f"Sent notification: {title}")
             else:
@@ -909,13 +1472,30 @@ class MaintenanceOrchestrator:
         except Exception as e:
             logger.error(f"Error sending notification: {e}")
 
-    def run_self_healing_cycle(self):
-        """Run complete self-healing and maintenance cycle"""
+    def process_maintenance_queue(self):
+        """Run queued maintenance tasks while a maintenance window is open"""
+        if not (self.maintenance_window and self.maintenance_queue):
+            return
+
+        tasks_executed = 0
+        while self.maintenance_queue and tasks_executed < 5:  # Limit tasks per cycle
+            # Highest priority first
+            task = heapq.heappop(self.maintenance_queue)[-1]
+            if self.execute_maintenance_task(task):
+                tasks_executed += 1
+            time.sleep(2)  # Brief pause between tasks
+
+    def run_self_healing_cycle(self, container_ids: Optional[Iterable[str]] = None):
+        """Run complete self-healing and maintenance cycle
+
+        container_ids limits the health check and recovery to those
+        containers, as after Docker events.
+        """
         try:
             logger.info("Starting self-healing cycle")
 
             # 1. Check service health
-            current_health = self.check_service_health()
+            current_health = self.check_service_health(container_ids)
 
             # 2. Attempt recovery for unhealthy services
             services_needing_recovery = [
@@ -925,35 +1505,32 @@ class MaintenanceOrchestrator:
                 and health.issues
             ]
 
-            recovery_actions = 0
-            for service_name, health_record in services_needing_recovery:
-                if self.attempt_service_recovery(service_name, health_record):
-                    recovery_actions += 1
-                    time.sleep(5)  # Brief pause between recovery attempts
+            # Recover services concurrently; each waits only as long as its
+            # container takes to come back
+            recovery_actions = sum(
+                self._pool.map(
+                    lambda item: self.attempt_service_recovery(*item),
+                    services_needing_recovery,
+                )
+            )
 
             # 3. Process maintenance queue during maintenance windows
-            if self.maintenance_window and self.maintenance_queue:
-                # Sort by priority (higher numbers first)
-                self.maintenance_queue.sort(key=lambda x: x.priority, reverse=True)
-
-                tasks_executed = 0
-                while (
-                    self.maintenance_queue and tasks_executed < 5
-                ):  # Limit tasks per cycle
-                    task = self.maintenance_queue.pop(0)
-                    if self.execute_maintenance_task(task):
-                        tasks_executed += 1
-                    time.sleep(2)  # Brief pause between tasks
-
-            # 4. Store health metrics
+            self.process_maintenance_queue()
+
+            # 4. Store health metrics for every tracked service
             if self.influxdb_client:
-                self.store_health_metrics(current_health)
+                self.store_health_metrics(self.service_health)
+                self._flush_influx(force=False)
 
             # 5. Update statistics
             healthy_services = len(
-                [h for h in current_health.values() if h.status == HealthStatus.HEALTHY]
+                [
+                    h
+                    for h in self.service_health.values()
+                    if h.status == HealthStatus.HEALTHY
+                ]
             )
-            total_services = len(current_health)
+            total_services = len(self.service_health)
 
             logger.info(
                 f"Self-healing cycle complete: {healthy_services}/{total_services} services healthy, "
@@ -1028,8 +1605,9 @@ class MaintenanceOrchestrator:
                 }
                 points.append(service_point)
 
-            self.influxdb_client.write_points(points)
-            logger.debug(f"Stored {len(points)} health metric points in InfluxDB")
+            # Written with other buffered points once the cycle's flush is due
+            self._influx_buffer.extend(_to_line(point) for point in points)
+            logger.debug(f"Buffered {len(points)} health metric points for InfluxDB")
 
         except Exception as e:
             logger.error(f"Error storing health metrics: {e}")
@@ -1038,19 +1616,54 @@ class MaintenanceOrchestrator:
         """Run continuous maintenance orchestration"""
         logger.info("Starting continuous maintenance orchestration")
 
+        threading.Thread(
+            target=self._follow_container_events, name="docker-events", daemon=True
+        ).start()
+
+        next_cycle = time.monotonic()
         while True:
             try:
                 # Run scheduled maintenance windows
-                schedule.run_pending()
-
-                # Run self-healing cycle
-                self.run_self_healing_cycle()
-
-                # Sleep until next cycle
-                time.sleep(HEALTH_CHECK_INTERVAL)
+                self.run_due_window_jobs()
+
+                # Run self-healing cycle: a full scan when due, otherwise
+                # only for containers that changed since the last one
+                changed = self._take_changed_containers()
+                if self._full_scan_requested or time.monotonic() >= next_cycle:
+                    self._full_scan_requested = False
+                    self.run_self_healing_cycle()
+                    next_cycle = time.monotonic() + HEALTH_CHECK_INTERVAL
+                elif changed:
+                    self.run_self_healing_cycle(changed)
+                else:
+                    # Queued tasks start as soon as a window opens instead
+                    # of waiting for the next scan or container event
+                    self.process_maintenance_queue()
+
+                # Flush points left over from earlier cycles once they are due
+                self._flush_influx(force=False)
+
+                # Wait for container events until the next full scan, window
+                # change or due InfluxDB flush, whichever is first
+                wake_in = min(
+                    next_cycle - time.monotonic(),
+                    self.seconds_until_next_window_job(),
+                )
+                if self.maintenance_window and self.maintenance_queue:
+                    # Keep going through tasks left over by the per-cycle limit
+                    wake_in = 0.0
+                elif self._influx_buffer:
+                    wake_in = min(
+                        wake_in,
+                        self._influx_last_flush
+                        + INFLUX_FLUSH_INTERVAL
+                        - time.monotonic(),
+                    )
+                self._container_event.wait(max(0.0, wake_in))
 
             except KeyboardInterrupt:
                 logger.info("Stopping maintenance orchestrator")
+                self._flush_influx()
                 break
             except Exception as e:
                 logger.error(f"Error in continuous orchestration: {e}")
@@ -9,12 +9,27 @@ import logging
 import asyncio
 import httpx
 import os
+import re
+import time
+from collections import deque
+from itertools import count, islice
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 import uvicorn
 from enum import Enum
 
+# orjson is optional; it serializes Loki payloads straight to bytes
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+except ImportError:
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,6 +41,20 @@ LOKI_URL = os.getenv("LOKI_URL", "http://loki:3100")
 SLACK_WEBHOOK = os.getenv("SLACK_WEBHOOK_URL", "http://slack-notifier:5001/webhook")
 WAZUH_API_URL = os.getenv("WAZUH_API_URL", "http://wazuh-manager:55000")
 AUTO_BLOCK = os.getenv("AUTO_BLOCK", "false").lower() == "true"
+HTTP_TIMEOUT = 10  # seconds, for Loki and Slack requests
+LOKI_BATCH_INTERVAL = 0.2  # seconds an entry may wait for others to join its push
+LOKI_BATCH_SIZE = 100  # entries per Loki push
+LOKI_QUEUE_SIZE = 10_000  # entries awaiting a push; the oldest are dropped beyond this
+THREAT_HISTORY_SIZE = 10_000  # recent events kept for /threats
+ALERT_DIGEST_WINDOW = 30  # seconds repeats of a severity roll into one alert
+ALERT_BURST = 5  # alerts sent right away before rate limiting
+ALERT_RATE = 0.2  # alerts per second added back to the burst
+
+
+# Signature keywords per severity, matched anywhere in the lowercased signature
+_CRITICAL_SIGNATURE_RE = re.compile(r"exploit|backdoor|trojan|malware")
+_HIGH_SIGNATURE_RE = re.compile(r"attack|intrusion|breach")
+_MEDIUM_SIGNATURE_RE = re.compile(r"suspicious|anomaly|scan")
 
 
 class ThreatSeverity(str, Enum):
@@ -35,12 +64,40 @@ class ThreatSeverity(str, Enum):
     CRITICAL = "critical"
 
 
+# Event ids are a per-process counter, tagged with the process start time so
+# they stay unique across restarts
+_event_counter = count()
+_PROCESS_TAG = format(int(time.time()), "x")
+
+
+def new_event_id(source: str) -> str:
+    """Id for an event from source"""
+    return f"{source}_{_PROCESS_TAG}_{next(_event_counter)}"
+
+
+# Slack alert decoration per severity
+_SEVERITY_EMOJI = {
+    ThreatSeverity.LOW: "🟢",
+    ThreatSeverity.MEDIUM: "🟡",
+    ThreatSeverity.HIGH: "🟠",
+    ThreatSeverity.CRITICAL: "🔴",
+}
+_SEVERITY_COLOR = {
+    ThreatSeverity.LOW: "warning",
+    ThreatSeverity.MEDIUM: "warning",
+    ThreatSeverity.HIGH: "warning",
+    ThreatSeverity.CRITICAL: "danger",
+}
+
+
 class ThreatEvent:
     """Normalized threat event"""
 
-    def __init__(self, raw_event: Dict[str, Any], source: str):
-        self.id = f"{source}_{int(datetime.now().timestamp())}"
-        self.timestamp = datetime.now().isoformat()
+    def __init__(
+        self, raw_event: Dict[str, Any], source: str, event_id: Optional[str] = None
+    ):
+        self.id = event_id or new_event_id(source)
+        self.timestamp = time.time()  # formatted only when served
         self.source = source
         self.raw_event = raw_event
         self.normalized = self._normalize_event()
@@ -108,25 +165,19 @@ class ThreatEvent:
     def _determine_severity(self) -> ThreatSeverity:
         """Determine threat severity based on normalized event"""
         confidence = self.normalized.get("confidence", 0)
-        signature = self.normalized.get("signature", "").lower()
+        # Zeek events carry no signature
+        signature = (self.normalized.get("signature") or "").lower()
 
         # Critical indicators
-        if any(
-            keyword in signature
-            for keyword in ["exploit", "backdoor", "trojan", "malware"]
-        ):
+        if _CRITICAL_SIGNATURE_RE.search(signature):
             return ThreatSeverity.CRITICAL
 
         # High severity indicators
-        if confidence > 0.8 or any(
-            keyword in signature for keyword in ["attack", "intrusion", "breach"]
-        ):
+        if confidence > 0.8 or _HIGH_SIGNATURE_RE.search(signature):
             return ThreatSeverity.HIGH
 
         # Medium severity
-        if confidence > 0.5 or any(
-            keyword in signature for keyword in ["suspicious", "anomaly", "scan"]
-        ):
+        if confidence > 0.5 or _MEDIUM_SIGNATURE_RE.search(signature):
             return ThreatSeverity.MEDIUM
 
         return ThreatSeverity.LOW
@@ -184,16 +235,95 @@ class ThreatEvent:
         return actions
 
 
+def _digest_line(event: ThreatEvent) -> str:
+    """One line describing an event in a digest alert"""
+    source_ip = event.normalized.get("source_ip") or "unknown"
+    description = event.normalized.get("description") or "No description"
+    return f"• {event.source.upper()} {source_ip}: {description}"
+
+
+class TokenBucket:
+    """Allows burst events at once, refilled at rate per second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        """Use up a token if one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
 class ThreatOrchestrator:
     """Main threat orchestration engine"""
 
     def __init__(self):
-        self.threat_events: List[ThreatEvent] = []
+        self.threat_events: deque = deque(maxlen=THREAT_HISTORY_SIZE)
+        self.events_processed = 0
         self.blocked_ips: List[str] = []
+        # Shared connection pool for Loki and Slack, opened at app startup
+        self.client: Optional[httpx.AsyncClient] = None
+        # (severity, source, timestamp ns, line) entries awaiting a Loki push;
+        # None tells the flusher to push what it holds and exit
+        self._loki_queue: asyncio.Queue = asyncio.Queue(maxsize=LOKI_QUEUE_SIZE)
+        self._loki_flusher: Optional[asyncio.Task] = None
+        self._loki_closed = False
+        self.loki_entries_dropped = 0
+        # Severity -> events held for that severity's digest alert
+        self._alert_digests: Dict[ThreatSeverity, List[ThreatEvent]] = {}
+        self._digest_tasks: set = set()
+        self._alert_bucket = TokenBucket(ALERT_RATE, ALERT_BURST)
+
+    async def start(self):
+        """Open the shared HTTP client and start the Loki batcher"""
+        self.client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=8),
+        )
+        self._loki_flusher = asyncio.create_task(self._flush_loki_batches())
+
+    async def stop(self):
+        """Push pending Loki entries and close the shared HTTP client"""
+        if self._loki_flusher is not None:
+            # Entries queued from here on could never be pushed
+            self._loki_closed = True
+            # Waits for room instead of dropping an entry; the flusher drains
+            await self._loki_queue.put(None)
+            await self._loki_flusher
+            self._loki_flusher = None
+
+        for task in list(self._digest_tasks):
+            task.cancel()
+        for severity in list(self._alert_digests):
+            await self._send_alert_digest(severity)
+
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def ingest(
+        self, raw_event: Dict[str, Any], source: str, event_id: str
+    ) -> Dict[str, Any]:
+        """Normalize a raw webhook event and process it"""
+        try:
+            event = ThreatEvent(raw_event, source, event_id)
+        except Exception as e:
+            logger.error(f"Error normalizing {source} event {event_id}: {e}")
+            return {"event_id": event_id, "error": str(e)}
+        return await self.process_threat(event)
 
     async def process_threat(self, event: ThreatEvent) -> Dict[str, Any]:
         """Process threat event and coordinate response"""
         self.threat_events.append(event)
+        self.events_processed += 1
 
         logger.info(
             f"Processing {event.severity.value} threat from {event.source}: {event.id}"
@@ -212,7 +342,7 @@ class ThreatOrchestrator:
 
         # Send notifications based on severity
         if event.severity in [ThreatSeverity.HIGH, ThreatSeverity.CRITICAL]:
-            await self._send_slack_alert(event)
+            await self._alert(event)
             response["notifications_sent"].append("slack")
 
         # Process recommended actions
@@ -227,8 +357,66 @@ class ThreatOrchestrator:
         return response
 
     async def _log_to_loki(self, event: ThreatEvent):
-        """Log threat event to Loki"""
+        """Queue threat event for the next Loki push"""
+        if self._loki_closed:
+            return
         try:
+            line = _json_dumps(
+                {
+                    "event_id": event.id,
+                    "severity": event.severity.value,
+                    "normalized": event.normalized,
+                    "actions": event.recommended_actions,
+                }
+            ).decode()
+            self._enqueue_loki(
+                (event.severity.value, event.source, str(time.time_ns()), line)
+            )
+        except Exception as e:
+            logger.error(f"Error logging to Loki: {e}")
+
+    def _enqueue_loki(self, entry: tuple):
+        """Queue an entry, dropping the oldest one while Loki lags behind"""
+        if self._loki_queue.full():
+            self._loki_queue.get_nowait()
+            self.loki_entries_dropped += 1
+            if self.loki_entries_dropped % LOKI_QUEUE_SIZE == 1:
+                logger.warning(
+                    f"Loki queue full, dropped {self.loki_entries_dropped} entries"
+                )
+        self._loki_queue.put_nowait(entry)
+
+    async def _flush_loki_batches(self):
+        """Push queued entries once LOKI_BATCH_SIZE have gathered or the
+        first has waited LOKI_BATCH_INTERVAL, until stop() queues None"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._loki_queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            deadline = loop.time() + LOKI_BATCH_INTERVAL
+            while len(batch) < LOKI_BATCH_SIZE:
+                try:
+                    entry = await asyncio.wait_for(
+                        self._loki_queue.get(), deadline - loop.time()
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._push_to_loki(batch)
+
+    async def _push_to_loki(self, batch: List[tuple]):
+        """Send entries to Loki in one push, one stream per severity/source"""
+        try:
+            streams: Dict[tuple, List[List[str]]] = {}
+            for severity, source, timestamp, line in batch:
+                streams.setdefault((severity, source), []).append([timestamp, line])
+
             log_entry = {
                 "streams": [
                     {
@@ -236,66 +424,78 @@ class ThreatOrchestrator:
                             "job": "threat-orchestrator",
                             "host": "maelstrom",
                             "service": "security",
-                            "severity": event.severity.value,
-                            "source": event.source,
+                            "severity": severity,
+                            "source": source,
                         },
-                        "values": [
-                            [
-                                str(int(datetime.now().timestamp() * 1000000000)),
-                                json.dumps(
-                                    {
-                                        "event_id": event.id,
-                                        "severity": event.severity.value,
-                                        "normalized": event.normalized,
-                                        "actions": event.recommended_actions,
-                                    }
-                                ),
-                            ]
-                        ],
+                        "values": values,
                     }
+                    for (severity, source), values in streams.items()
                 ]
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{LOKI_URL}/loki/api/v1/push", json=log_entry
-                )
-                if response.status_code == 204:
-                    logger.info(f"Logged threat event {event.id} to Loki")
+            response = await self.client.post(
+                f"{LOKI_URL}/loki/api/v1/push",
+                content=_json_dumps(log_entry),
+                headers={"Content-Type": "application/json"},
+            )
+            if response.status_code == 204:
+                logger.info(f"Logged {len(batch)} threat events to Loki")
         except Exception as e:
             logger.error(f"Error logging to Loki: {e}")
 
-    async def _send_slack_alert(self, event: ThreatEvent):
-        """Send threat alert to Slack"""
+    async def _alert(self, event: ThreatEvent):
+        """Alert on a threat, rolling repeats of its severity into a digest
+
+        The first alert of a severity goes out right away while the rate
+        limit allows. Repeats within ALERT_DIGEST_WINDOW, and rate-limited
+        ones, are sent as one alert when the window closes.
+        """
+        pending = self._alert_digests.get(event.severity)
+        if pending is None:
+            pending = self._alert_digests[event.severity] = []
+            task = asyncio.create_task(self._close_alert_window(event.severity))
+            self._digest_tasks.add(task)
+            task.add_done_callback(self._digest_tasks.discard)
+            if self._alert_bucket.take():
+                await self._send_slack_alert(event)
+                return
+        pending.append(event)
+
+    async def _close_alert_window(self, severity: ThreatSeverity):
+        """Send the severity's digest once its window has passed"""
+        await asyncio.sleep(ALERT_DIGEST_WINDOW)
+        await self._send_alert_digest(severity)
+
+    async def _send_alert_digest(self, severity: ThreatSeverity):
+        """Send the held alerts of a severity as one, listing each event"""
+        pending = self._alert_digests.pop(severity, [])
+        if pending:
+            await self._send_slack_alert(pending[-1], pending)
+
+    async def _send_slack_alert(
+        self, event: ThreatEvent, held: Optional[List[ThreatEvent]] = None
+    ):
+        """Send threat alert to Slack; held lists the events a digest covers"""
         try:
-            severity_emoji = {
-                ThreatSeverity.LOW: "🟢",
-                ThreatSeverity.MEDIUM: "🟡",
-                ThreatSeverity.HIGH: "🟠",
-                ThreatSeverity.CRITICAL: "🔴",
-            }
-
+            # Limit to first 3 actions
             actions_text = "\n".join(
-                [
-                    f"• {action['type']}: {action['description']}"
-                    for action in event.recommended_actions[
-                        :3
-                    ]  # Limit to first 3 actions
-                ]
+                f"• {action['type']}: {action['description']}"
+                for action in event.recommended_actions[:3]
             )
 
+            title = f"🛡️ Threat Detected - {event.severity.value.upper()}"
+            digest = held is not None and len(held) > 1
+            if digest:
+                title += f" ({len(held)} events in the last {ALERT_DIGEST_WINDOW}s)"
+
             message = {
-                "text": f"🛡️ Threat Detected - {event.severity.value.upper()}",
+                "text": title,
                 "attachments": [
                     {
-                        "color": (
-                            "danger"
-                            if event.severity == ThreatSeverity.CRITICAL
-                            else "warning"
-                        ),
+                        "color": _SEVERITY_COLOR[event.severity],
                         "fields": [
                             {
-                                "title": f"Severity {severity_emoji[event.severity]}",
+                                "title": f"Severity {_SEVERITY_EMOJI[event.severity]}",
                                 "value": event.severity.value.upper(),
                                 "short": True,
                             },
@@ -332,30 +532,33 @@ class ThreatOrchestrator:
                 ],
             }
 
-            if event.recommended_actions and any(
-                action.get("runbook") for action in event.recommended_actions
-            ):
-                runbook = next(
-                    (
-                        action["runbook"]
-                        for action in event.recommended_actions
-                        if action.get("runbook")
-                    ),
-                    None,
+            runbook = next(
+                (
+                    action["runbook"]
+                    for action in event.recommended_actions
+                    if action.get("runbook")
+                ),
+                None,
+            )
+            if digest:
+                # Every distinct event, so no source or IP is hidden behind
+                # the one shown above
+                lines = dict.fromkeys(_digest_line(held_event) for held_event in held)
+                message["attachments"][0]["fields"].append(
+                    {"title": "Events", "value": "\n".join(lines), "short": False}
+                )
+            if runbook:
+                message["attachments"][0]["fields"].append(
+                    {
+                        "title": "Runbook",
+                        "value": f"<{runbook}|Investigation Procedures>",
+                        "short": False,
+                    }
                 )
-                if runbook:
-                    message["attachments"][0]["fields"].append(
-                        {
-                            "title": "Runbook",
-                            "value": f"<{runbook}|Investigation Procedures>",
-                            "short": False,
-                        }
-                    )
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(SLACK_WEBHOOK, json=message)
-                if response.status_code == 200:
-                    logger.info(f"Sent threat alert {event.id} to Slack")
+            response = await self.client.post(SLACK_WEBHOOK, json=message)
+            if response.status_code == 200:
+                logger.info(f"Sent threat alert {event.id} to Slack")
         except Exception as e:
             logger.error(f"Error sending to Slack: {e}")
 
@@ -363,13 +566,23 @@ class ThreatOrchestrator:
 orchestrator = ThreatOrchestrator()
 
 
+@app.on_event("startup")
+async def startup():
+    await orchestrator.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await orchestrator.stop()
+
+
 @app.get("/")
 async def root():
     return {
         "service": "Threat Orchestrator",
         "status": "running",
         "auto_block_enabled": AUTO_BLOCK,
-        "events_processed": len(orchestrator.threat_events),
+        "events_processed": orchestrator.events_processed,
     }
 
 
@@ -378,9 +591,10 @@ async def receive_suricata_event(
     event_data: Dict[str, Any], background_tasks: BackgroundTasks
 ):
     """Receive Suricata IDS events"""
-    threat_event = ThreatEvent(event_data, "suricata")
-    background_tasks.add_task(orchestrator.process_threat, threat_event)
-    return {"status": "received", "event_id": threat_event.id}
+    # Normalization runs after the response is sent
+    event_id = new_event_id("suricata")
+    background_tasks.add_task(orchestrator.ingest, event_data, "suricata", event_id)
+    return {"status": "received", "event_id": event_id}
 
 
 @app.post("/webhook/zeek")
@@ -388,9 +602,10 @@ async def receive_zeek_event(
     event_data: Dict[str, Any], background_tasks: BackgroundTasks
 ):
     """Receive Zeek network analysis events"""
-    threat_event = ThreatEvent(event_data, "zeek")
-    background_tasks.add_task(orchestrator.process_threat, threat_event)
-    return {"status": "received", "event_id": threat_event.id}
+    # Normalization runs after the response is sent
+    event_id = new_event_id("zeek")
+    background_tasks.add_task(orchestrator.ingest, event_data, "zeek", event_id)
+    return {"status": "received", "event_id": event_id}
 
 
 @app.post("/webhook/wazuh")
@@ -398,20 +613,23 @@ async def receive_wazuh_event(
     event_data: Dict[str, Any], background_tasks: BackgroundTasks
 ):
     """Receive Wazuh SIEM events"""
-    threat_event = ThreatEvent(event_data, "wazuh")
-    background_tasks.add_task(orchestrator.process_threat, threat_event)
-    return {"status": "received", "event_id": threat_event.id}
+    # Normalization runs after the response is sent
+    event_id = new_event_id("wazuh")
+    background_tasks.add_task(orchestrator.ingest, event_data, "wazuh", event_id)
+    return {"status": "received", "event_id": event_id}
 
 
 @app.get("/threats")
 async def get_recent_threats(limit: int = 10):
     """Get recent threat events"""
-    recent_events = orchestrator.threat_events[-limit:]
+    # Newest `limit` events, oldest first
+    recent_events = list(islice(reversed(orchestrator.threat_events), max(limit, 0)))
+    recent_events.reverse()
     return {
         "threats": [
             {
                 "id": event.id,
-                "timestamp": event.timestamp,
+                "timestamp": datetime.fromtimestamp(event.timestamp).isoformat(),
                 "source": event.source,
                 "severity": event.severity.value,
                 "description": event.normalized.get("description"),
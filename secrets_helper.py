@@ -6,7 +6,11 @@ so that `from secrets_helper import ...` continues to work.
 
 from collections.ml_analytics.secrets_helper import (
     read_secret,
+    read_secrets_bulk,
     get_database_url,
     get_slack_webhook,
     get_api_key,
+    invalidate_secret,
+    refresh_secrets_dir,
+    reset_secret_cache,
 )
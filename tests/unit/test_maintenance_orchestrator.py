@@ -0,0 +1,94 @@
+import importlib.util
+import pathlib
+import threading
+from collections import deque
+from unittest.mock import Mock
+
+import pytest
+
+pytest.importorskip("docker")
+pytest.importorskip("psutil")
+pytest.importorskip("cryptography")
+requests = pytest.importorskip("requests")
+influx_exceptions = pytest.importorskip("influxdb.exceptions")
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+_spec = importlib.util.spec_from_file_location(
+    "self_healing_maintenance_orchestrator",
+    ROOT / "collections" / "self-healing" / "maintenance_orchestrator.py",
+)
+mo = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mo)
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    # Skip __init__, which connects to dockerd and InfluxDB
+    orch = mo.MaintenanceOrchestrator.__new__(mo.MaintenanceOrchestrator)
+    orch.influxdb_client = Mock()
+    orch._influx_buffer = deque(maxlen=mo.INFLUX_BUFFER_MAX)
+    orch._influx_last_flush = 0.0
+    orch._notif_lock = threading.Lock()
+    orch._notif_window = {}
+    orch._notif_bucket = mo.TokenBucket(mo.NOTIFICATION_RATE, mo.NOTIFICATION_BURST)
+    orch.posted = []
+    orch._post_notification = lambda *args: orch.posted.append(args)
+    # Digests are flushed by hand; keep the timers from firing mid-test
+    monkeypatch.setattr(mo, "NOTIFICATION_DIGEST_WINDOW", 3600)
+    return orch
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.exceptions.ConnectionError("refused"),
+        requests.exceptions.ReadTimeout("timed out"),
+        influx_exceptions.InfluxDBServerError("unavailable"),
+    ],
+)
+def test_flush_requeues_points_on_transient_error(orchestrator, error):
+    orchestrator._influx_buffer.extend(["a 1", "b 2"])
+    orchestrator.influxdb_client.write_points.side_effect = error
+
+    orchestrator._flush_influx()
+
+    assert list(orchestrator._influx_buffer) == ["a 1", "b 2"]
+
+
+def test_flush_drops_points_rejected_by_influxdb(orchestrator):
+    orchestrator._influx_buffer.extend(["a 1", "b 2"])
+    orchestrator.influxdb_client.write_points.side_effect = (
+        influx_exceptions.InfluxDBClientError("field type conflict", 400)
+    )
+
+    orchestrator._flush_influx()
+
+    assert not orchestrator._influx_buffer
+
+
+def test_digest_lists_every_distinct_held_message(orchestrator):
+    for service in ("influxdb", "grafana", "vault", "grafana"):
+        orchestrator.send_notification(
+            "❌ Recovery Failed", f"Failed to recover '{service}'", "danger"
+        )
+    assert orchestrator.posted == [
+        ("❌ Recovery Failed", "Failed to recover 'influxdb'", "danger")
+    ]
+
+    orchestrator._flush_notification_digest("❌ Recovery Failed")
+
+    title, message, level = orchestrator.posted[-1]
+    assert (title, level) == ("❌ Recovery Failed", "danger")
+    assert message.count("'grafana'") == 1
+    assert "'vault'" in message
+    assert "(3 notifications" in message
+
+
+def test_single_held_notification_is_sent_unchanged(orchestrator):
+    orchestrator._notif_bucket.tokens = 0
+
+    orchestrator.send_notification("🔧 Maintenance Window Started", "begun", "info")
+    assert orchestrator.posted == []
+
+    orchestrator._flush_notification_digest("🔧 Maintenance Window Started")
+    assert orchestrator.posted == [("🔧 Maintenance Window Started", "begun", "info")]
@@ -0,0 +1,80 @@
+import importlib.util
+import pathlib
+import threading
+from collections import deque
+from unittest.mock import Mock
+
+import pytest
+
+pytest.importorskip("docker")
+pytest.importorskip("psutil")
+requests = pytest.importorskip("requests")
+influx_exceptions = pytest.importorskip("influxdb.exceptions")
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+_spec = importlib.util.spec_from_file_location(
+    "resource_optimizer_resource_monitor",
+    ROOT / "collections" / "resource-optimizer" / "resource_monitor.py",
+)
+rm = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(rm)
+
+
+@pytest.fixture
+def optimizer():
+    # Skip __init__, which connects to dockerd and starts worker threads
+    opt = rm.ResourceOptimizer.__new__(rm.ResourceOptimizer)
+    opt.influxdb_client = Mock()
+    opt._point_buffer = deque(maxlen=rm.WRITE_BUFFER_MAX)
+    opt._buffer_lock = threading.Lock()
+    return opt
+
+
+def test_flush_requeues_points_ahead_of_newer_ones(optimizer):
+    optimizer._point_buffer.extend([{"p": 1}, {"p": 2}])
+
+    def fail_and_buffer_more(points, **kwargs):
+        # Points stored while the write is in flight stay behind the batch
+        optimizer._point_buffer.append({"p": 3})
+        raise requests.exceptions.ConnectionError("refused")
+
+    optimizer.influxdb_client.write_points.side_effect = fail_and_buffer_more
+
+    optimizer.flush_points()
+
+    assert list(optimizer._point_buffer) == [{"p": 1}, {"p": 2}, {"p": 3}]
+
+
+def test_flush_requeues_points_on_server_error(optimizer):
+    optimizer._point_buffer.append({"p": 1})
+    optimizer.influxdb_client.write_points.side_effect = (
+        influx_exceptions.InfluxDBClientError("gateway timeout", 504)
+    )
+
+    optimizer.flush_points()
+
+    assert list(optimizer._point_buffer) == [{"p": 1}]
+
+
+def test_flush_drops_points_rejected_by_influxdb(optimizer):
+    optimizer._point_buffer.append({"p": 1})
+    optimizer.influxdb_client.write_points.side_effect = (
+        influx_exceptions.InfluxDBClientError("unable to parse", 400)
+    )
+
+    optimizer.flush_points()
+
+    assert not optimizer._point_buffer
+
+
+def test_stopping_monitoring_flushes_buffered_points(optimizer, monkeypatch):
+    optimizer._point_buffer.append({"p": 1})
+    monkeypatch.setattr(
+        optimizer, "run_monitoring_cycle", Mock(side_effect=KeyboardInterrupt)
+    )
+
+    optimizer.run_continuous_monitoring()
+
+    optimizer.influxdb_client.write_points.assert_called_once()
+    assert optimizer.influxdb_client.write_points.call_args.args[0] == [{"p": 1}]
+    assert not optimizer._point_buffer
@@ -0,0 +1,113 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+_spec = importlib.util.spec_from_file_location(
+    "ml_analytics_secrets_helper",
+    ROOT / "collections" / "ml_analytics" / "secrets_helper.py",
+)
+sh = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sh)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    sh.reset_secret_cache()
+    yield
+    sh.reset_secret_cache()
+
+
+def test_reads_secret_file(monkeypatch, tmp_path):
+    (tmp_path / "unit_test_file").write_text("from_file\n")
+    monkeypatch.setattr(sh, "SECRETS_DIR", str(tmp_path))
+    monkeypatch.setenv("UNIT_TEST_FILE", "from_env")
+
+    assert sh.read_secret("unit_test_file") == "from_file"
+
+
+def test_read_secrets_bulk(monkeypatch, tmp_path):
+    (tmp_path / "unit_test_cert").write_text("cert\n")
+    monkeypatch.setattr(sh, "SECRETS_DIR", str(tmp_path))
+    monkeypatch.setenv("UNIT_TEST_KEY", "key")
+    monkeypatch.delenv("UNIT_TEST_ABSENT", raising=False)
+
+    assert sh.read_secrets_bulk(
+        ["unit_test_cert", "unit_test_key", "unit_test_absent"]
+    ) == {"unit_test_cert": "cert", "unit_test_key": "key", "unit_test_absent": None}
+
+
+def test_preload_reads_only_manifest_secrets(monkeypatch, tmp_path):
+    (tmp_path / "unit_test_declared").write_text("declared\n")
+    (tmp_path / "unit_test_other").write_text("other\n")
+    monkeypatch.setattr(sh, "SECRETS_DIR", str(tmp_path))
+    monkeypatch.setattr(sh, "_SECRET_MANIFEST", frozenset({"unit_test_declared"}))
+
+    assert sh._load_secret_files() == {"unit_test_declared": "declared"}
+    # Names outside the manifest are still read on demand
+    assert sh.read_secret("unit_test_other") == "other"
+
+
+def test_env_fallback_is_cached(monkeypatch):
+    monkeypatch.setenv("UNIT_TEST_SECRET_ENV", "first")
+    assert sh.read_secret("unit_test_secret", "UNIT_TEST_SECRET_ENV") == "first"
+
+    # Later env changes are not seen until the cache is reset
+    monkeypatch.setenv("UNIT_TEST_SECRET_ENV", "second")
+    assert sh.read_secret("unit_test_secret", "UNIT_TEST_SECRET_ENV") == "first"
+
+    sh.reset_secret_cache()
+    assert sh.read_secret("unit_test_secret", "UNIT_TEST_SECRET_ENV") == "second"
+
+
+def test_missing_secret(monkeypatch):
+    monkeypatch.delenv("UNIT_TEST_MISSING", raising=False)
+    assert sh.read_secret("unit_test_missing", required=False) is None
+    with pytest.raises(ValueError, match="Required secret 'unit_test_missing'"):
+        sh.read_secret("unit_test_missing")
+
+
+def test_invalidate_secret_rereads_only_that_secret(monkeypatch):
+    monkeypatch.delenv("UNIT_TEST_ROTATED", raising=False)
+    monkeypatch.setenv("UNIT_TEST_STABLE", "stable")
+    assert sh.read_secret("unit_test_rotated", required=False) is None
+    assert sh.read_secret("unit_test_stable") == "stable"
+
+    monkeypatch.setenv("UNIT_TEST_ROTATED", "rotated")
+    monkeypatch.setenv("UNIT_TEST_STABLE", "changed")
+    # The miss is cached until the secret is invalidated
+    assert sh.read_secret("unit_test_rotated", required=False) is None
+
+    sh.invalidate_secret("unit_test_rotated")
+    assert sh.read_secret("unit_test_rotated") == "rotated"
+    assert sh.read_secret("unit_test_stable") == "stable"
+
+
+def test_refresh_secrets_dir_picks_up_new_mount(monkeypatch, tmp_path):
+    mount = tmp_path / "secrets"
+    monkeypatch.setattr(sh, "SECRETS_DIR", str(mount))
+    monkeypatch.delenv("UNIT_TEST_MOUNTED", raising=False)
+    assert sh.read_secret("unit_test_mounted", required=False) is None
+
+    mount.mkdir()
+    (mount / "unit_test_mounted").write_text("mounted")
+    assert sh.read_secret("unit_test_mounted", required=False) is None
+
+    sh.refresh_secrets_dir()
+    assert sh.read_secret("unit_test_mounted") == "mounted"
+
+
+def test_database_urls(monkeypatch):
+    for var in ("INFLUXDB_HOST", "INFLUXDB_PORT", "INFLUXDB_DB", "ZABBIX_DB_HOST"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("INFLUXDB_ADMIN_USER", "admin")
+    monkeypatch.setenv("INFLUXDB_ADMIN_PASSWORD", "pw")
+    monkeypatch.setenv("ZABBIX_DB_USER", "zabbix")
+    monkeypatch.setenv("ZABBIX_DB_NAME", "zabbix")
+    monkeypatch.delenv("ZABBIX_DB_PASSWORD", raising=False)
+
+    assert sh.get_database_url("influxdb") == "http://admin:pw@influxdb:8086"
+    assert sh.get_database_url("mysql") == "mysql://mysql/zabbix"
+    with pytest.raises(ValueError, match="Unsupported database type"):
+        sh.get_database_url("postgres")
@@ -0,0 +1,142 @@
+import asyncio
+import importlib.util
+import json
+import pathlib
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+_spec = importlib.util.spec_from_file_location(
+    "threat_orchestrator_service",
+    ROOT / "collections" / "threat-orchestrator" / "threat_orchestrator.py",
+)
+to = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(to)
+
+
+class FakeClient:
+    """Records posts instead of sending them"""
+
+    def __init__(self):
+        self.posts = []
+
+    async def post(self, url, json=None, content=None, headers=None):
+        self.posts.append((url, json if json is not None else content))
+        return SimpleNamespace(status_code=204 if "loki" in url else 200)
+
+    async def aclose(self):
+        pass
+
+    def loki_values(self):
+        return [
+            value
+            for url, body in self.posts
+            if "loki" in url
+            for stream in json.loads(body)["streams"]
+            for value in stream["values"]
+        ]
+
+
+def _event(source_ip: str, signature: str = "ET exploit attempt"):
+    return to.ThreatEvent(
+        {"alert": {"signature": signature, "severity": 3}, "src_ip": source_ip},
+        "suricata",
+    )
+
+
+def _orchestrator():
+    orch = to.ThreatOrchestrator()
+    orch.client = FakeClient()
+    return orch
+
+
+def test_stop_pushes_the_batch_the_flusher_holds():
+    async def scenario():
+        orch = _orchestrator()
+        client = orch.client
+        orch._loki_flusher = asyncio.create_task(orch._flush_loki_batches())
+        for i in range(3):
+            await orch._log_to_loki(_event(f"10.0.0.{i}"))
+        # Let the flusher take the entries into its batch before stopping
+        await asyncio.sleep(0)
+
+        await orch.stop()
+        return client
+
+    client = asyncio.run(scenario())
+
+    assert len(client.posts) == 1
+    assert len(client.loki_values()) == 3
+
+
+def test_entries_logged_after_stop_are_ignored():
+    async def scenario():
+        orch = _orchestrator()
+        orch._loki_flusher = asyncio.create_task(orch._flush_loki_batches())
+        await orch.stop()
+        await orch._log_to_loki(_event("10.0.0.1"))
+        return orch
+
+    orch = asyncio.run(scenario())
+
+    assert orch._loki_queue.empty()
+
+
+def test_full_loki_queue_drops_the_oldest_entries():
+    async def scenario():
+        orch = _orchestrator()
+        orch._loki_queue = asyncio.Queue(maxsize=2)
+        for i in range(3):
+            await orch._log_to_loki(_event(f"10.0.0.{i}"))
+        return orch, [orch._loki_queue.get_nowait() for _ in range(2)]
+
+    orch, entries = asyncio.run(scenario())
+
+    assert orch.loki_entries_dropped == 1
+    assert [json.loads(entry[3])["normalized"]["source_ip"] for entry in entries] == [
+        "10.0.0.1",
+        "10.0.0.2",
+    ]
+
+
+def test_unserializable_event_does_not_break_processing():
+    async def scenario():
+        orch = _orchestrator()
+        event = _event("10.0.0.1", "port scan")
+        event.normalized["raw"] = object()
+        return orch, await orch.process_threat(event)
+
+    orch, response = asyncio.run(scenario())
+
+    assert response["event_id"]
+    assert orch._loki_queue.empty()
+
+
+def test_alert_digest_lists_every_held_event(monkeypatch):
+    monkeypatch.setattr(to, "ALERT_DIGEST_WINDOW", 3600)
+
+    async def scenario():
+        orch = _orchestrator()
+        for source_ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.2"):
+            await orch._alert(_event(source_ip))
+        await orch._send_alert_digest(to.ThreatSeverity.CRITICAL)
+        for task in orch._digest_tasks:
+            task.cancel()
+        return orch.client
+
+    client = asyncio.run(scenario())
+
+    first, digest = [body for _, body in client.posts]
+    assert "events in the last" not in first["text"]
+    assert "(3 events in the last 3600s)" in digest["text"]
+    fields = {
+        field["title"]: field["value"] for field in digest["attachments"][0]["fields"]
+    }
+    assert fields["Events"].splitlines() == [
+        "• SURICATA 10.0.0.2: ET exploit attempt",
+        "• SURICATA 10.0.0.3: ET exploit attempt",
+    ]